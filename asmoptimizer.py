@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Optimizers for the code of AsmTranslator. The code is split into single instructions, the
+# peephole optimizer rewrites it with the rules of PEEPHOLE_RULES until none of them applies, and
+# the jump optimizer removes what the jumps make useless.
+#
+# Machine assumptions the rules rely on:
+#   - RD, ADD, SUB, MUL, DIV and IN change only the accumulator, WR changes only its operand
+#   - PUSH and POP change only the stack and, for POP, their register
+#   - the translator never keeps a value in a temporary (R1 and the temporary cell) across a label
+#     or a jump, so temporaries are dead at the end of a basic block
+# Labels, jumps, HLT and lines that are not instructions of the machine end a window.
+
+import sys
+
+ACCUMULATOR = 'ACC'
+STACK = 'STACK'
+
+ACCUMULATOR_OPS = ('RD', 'ADD', 'SUB', 'MUL', 'DIV')
+ARITHMETIC_OPS = ('ADD', 'SUB', 'MUL', 'DIV')
+JUMP_OPS = ('JMP', 'JZ', 'JNZ')
+INSTRUCTION_OPS = ACCUMULATOR_OPS + JUMP_OPS + ('WR', 'PUSH', 'POP', 'IN', 'OUT', 'NOP', 'HLT')
+
+LABEL = 'LABEL'
+# line that is not an instruction of the machine, it may use anything
+RAW = 'RAW'
+
+# longest run of instructions matched by '...' in a pattern
+MAX_GAP = 16
+# instructions looked through to find the next use of a temporary
+MAX_LIVENESS_SCAN = 64
+# instructions before a rewrite that are looked at again after it, more of them find few more
+# rewrites than another pass does and take longer
+BACKTRACK = 1
+
+
+class Instruction:
+    __slots__ = ('op', 'arg', 'line')
+
+    def __init__(self, op, arg, line):
+        self.op = op
+        self.arg = arg
+        self.line = line
+
+    @classmethod
+    def parse(cls, line):
+        op, _, arg = line.partition(' ')
+
+        if line.endswith(':') and arg == '':
+            return cls(LABEL, line[:-1], line)
+        elif op in INSTRUCTION_OPS:
+            return cls(op, arg if arg != '' else None, line)
+        else:
+            return cls(RAW, None, line)
+
+    def __repr__(self):
+        return self.line
+
+    def is_barrier(self):
+        return self.op in (LABEL, RAW, 'HLT') or self.op in JUMP_OPS
+
+    def get_reads(self):
+        op = self.op
+        operand = () if self.arg is None or self.arg.startswith('#') else (self.arg, )
+
+        if op == 'RD':
+            return operand
+        elif op in ARITHMETIC_OPS:
+            return (ACCUMULATOR, ) + operand
+        elif op in ('WR', 'OUT', 'JZ', 'JNZ'):
+            return (ACCUMULATOR, )
+        elif op == 'PUSH':
+            return (self.arg, STACK)
+        elif op == 'POP':
+            return (STACK, )
+        else:
+            return ()
+
+    def get_writes(self):
+        op = self.op
+
+        if op in ACCUMULATOR_OPS or op == 'IN':
+            return (ACCUMULATOR, )
+        elif op == 'WR':
+            return (self.arg, )
+        elif op == 'PUSH':
+            return (STACK, )
+        elif op == 'POP':
+            return (self.arg, STACK)
+        else:
+            return ()
+
+
+class PeepholeRule:
+    # pattern: instructions like 'OP {x}' where {x} matches any operand and the same operand
+    # everywhere in the rule, '{op}' matches any operation, and '...' matches up to MAX_GAP
+    # instructions that do not write the locations of gap_no_write and do not use the locations
+    # of gap_no_use. replacement: instructions with the matched operands, '...' is the matched gap.
+    # condition: called with the optimizer, the bindings and the index after the match
+
+    def __init__(self, name, pattern, replacement, gap_no_write=(), gap_no_use=(), condition=None):
+        self.name = name
+        self.pattern = [self.parse_item(item) for item in pattern]
+        self.replacement = [self.parse_item(item) for item in replacement]
+        self.gap_no_write = gap_no_write
+        self.gap_no_use = gap_no_use
+        self.condition = condition
+
+    @staticmethod
+    def parse_item(item):
+        # returns the operation and the operand, each with whether it is a variable, or None for
+        # a gap
+        if item == '...':
+            return None
+
+        op, _, arg = item.partition(' ')
+        arg = arg if arg != '' else None
+        return get_name(op), is_variable(op), get_name(arg), is_variable(arg)
+
+
+def is_variable(s):
+    return s is not None and s.startswith('{')
+
+
+def get_name(s):
+    return s[1:-1] if is_variable(s) else s
+
+
+def bind(bindings, pattern_value, variable, value):
+    if not variable:
+        return pattern_value == value
+    elif pattern_value in bindings:
+        return bindings[pattern_value] == value
+
+    bindings[pattern_value] = value
+    return True
+
+
+def is_temporary_dead(optimizer, bindings, end, name='t'):
+    return optimizer.is_dead(bindings[name], end)
+
+
+PEEPHOLE_RULES = [
+    # a value pushed and popped back into the same register that kept it
+    PeepholeRule('push-pop', ['PUSH {r}', '...', 'POP {r}'], ['...'],
+                 gap_no_write=('{r}', ), gap_no_use=(STACK, )),
+    # a popped value that is not used
+    PeepholeRule('discarded-push', ['PUSH {t}', '...', 'POP {t}'], ['...'],
+                 gap_no_use=(STACK, ), condition=is_temporary_dead),
+    PeepholeRule('store-load', ['WR {x}', 'RD {x}'], ['WR {x}']),
+    PeepholeRule('load-store', ['RD {x}', 'WR {x}'], ['RD {x}']),
+    PeepholeRule('dead-load', ['RD {x}', 'RD {y}'], ['RD {y}']),
+    PeepholeRule('dead-store', ['WR {t}'], [], condition=is_temporary_dead),
+    # a temporary is read from where its value came from
+    PeepholeRule('forward-load', ['RD {x}', 'WR {t}', '...', 'RD {t}'], ['RD {x}', 'WR {t}', '...', 'RD {x}'],
+                 gap_no_write=('{x}', '{t}'),
+                 condition=lambda optimizer, bindings, end: optimizer.is_temporary(bindings['t'])),
+    # the left operand is loaded after the right one: the right operand is used in place
+    PeepholeRule('fold-operand', ['RD {x}', 'WR {t}', 'RD {y}', '{op} {t}'], ['RD {y}', '{op} {x}'],
+                 condition=lambda optimizer, bindings, end: bindings['op'] in ARITHMETIC_OPS and
+                 bindings['y'] != bindings['t'] and is_temporary_dead(optimizer, bindings, end)),
+]
+
+
+class PeepholeOptimizer:
+
+    def __init__(self, temporaries=('R1', '499'), rules=PEEPHOLE_RULES):
+        self.temporaries = temporaries
+        self.rules = rules
+        # rules by the operation of their first instruction, which is never a variable
+        self.rules_by_op = {}
+        for rule in rules:
+            self.rules_by_op.setdefault(rule.pattern[0][0], []).append(rule)
+        # instructions removed by the last optimize
+        self.removed = 0
+        # instructions not yet looked at in reverse order, the next one last
+        self.pending = []
+
+    def get_pending(self, i):
+        # instruction i places after the next one, None after the last instruction
+        pending = self.pending
+        return pending[-1 - i] if i < len(pending) else None
+
+    def is_temporary(self, location):
+        return location in self.temporaries
+
+    def is_dead(self, location, i):
+        # whether the value of a temporary before pending instruction i is overwritten before it
+        # is used
+        if not self.is_temporary(location):
+            return False
+
+        for j in range(i, i + MAX_LIVENESS_SCAN):
+            instruction = self.get_pending(j)
+
+            if instruction is None:
+                return True
+            elif instruction.op == RAW or location in instruction.get_reads():
+                return False
+            elif location in instruction.get_writes() or instruction.is_barrier():
+                return True
+
+        return False
+
+    def optimize(self, lines):
+        # lines: instructions of the program, one per line. Returns the optimized lines
+        instructions = [Instruction.parse(line) for line in lines if line != '']
+        count = len(instructions)
+
+        changed = True
+        while changed:
+            instructions, changed = self.run_pass(instructions)
+
+        self.removed = count - len(instructions)
+        return [instruction.line for instruction in instructions]
+
+    def run_pass(self, instructions):
+        # After a rewrite the replacement and the instruction before it are looked at again, so
+        # most rewrites that a rewrite makes possible are done in the same pass
+        pending = self.pending = instructions[::-1]
+        result = []
+        changed = False
+        rules_by_op = self.rules_by_op
+
+        while len(pending) > 0:
+            for rule in rules_by_op.get(pending[-1].op, ()):
+                match = self.match(rule)
+                if match is not None:
+                    length, replacement = match
+                    del pending[len(pending) - length:]
+                    pending += reversed(replacement)
+
+                    for _ in range(min(BACKTRACK, len(result))):
+                        pending.append(result.pop())
+
+                    changed = True
+                    break
+            else:
+                result.append(pending.pop())
+
+        return result, changed
+
+    def match(self, rule):
+        # matches the rule at the next pending instruction, returns the number of the matched
+        # instructions and the replacement instructions, or None
+        pending = self.pending
+        top = len(pending) - 1
+        bindings = {}
+        gap = None
+        i = 0
+
+        for k, item in enumerate(rule.pattern):
+            if item is None:
+                # the gap ends before the first instruction matching the next item
+                op, op_variable, arg, arg_variable = rule.pattern[k + 1]
+                no_write = {bindings.get(get_name(location), location) for location in rule.gap_no_write}
+                no_use = {bindings.get(get_name(location), location) for location in rule.gap_no_use}
+                gap = []
+
+                while True:
+                    if i > top or len(gap) > MAX_GAP:
+                        return None
+
+                    instruction = pending[top - i]
+                    if instruction.is_barrier():
+                        return None
+                    if (op_variable or op == instruction.op) and \
+                            (bindings.get(arg) if arg_variable else arg) == instruction.arg:
+                        break
+                    if not no_write.isdisjoint(instruction.get_writes()) or \
+                            not no_use.isdisjoint(instruction.get_reads()) or \
+                            not no_use.isdisjoint(instruction.get_writes()):
+                        return None
+
+                    gap.append(instruction)
+                    i += 1
+
+                continue
+
+            if i > top:
+                return None
+
+            instruction = pending[top - i]
+            op, op_variable, arg, arg_variable = item
+            if instruction.op == LABEL or instruction.op == RAW or \
+                    not bind(bindings, op, op_variable, instruction.op) or \
+                    not bind(bindings, arg, arg_variable, instruction.arg):
+                return None
+            i += 1
+
+        if rule.condition is not None and not rule.condition(self, bindings, i):
+            return None
+
+        replacement = []
+        for item in rule.replacement:
+            if item is None:
+                replacement += gap
+            else:
+                op, op_variable, arg, arg_variable = item
+                op = bindings[op] if op_variable else op
+                arg = bindings[arg] if arg_variable else arg
+                replacement.append(Instruction.parse(op if arg is None else op + ' ' + arg))
+
+        return i, replacement
+
+
+class JumpOptimizer:
+    # Makes jumps to a jump go to its target and jumps to one of several labels of a place go to
+    # the first of them, then removes jumps to the next instruction, code that neither a jump nor
+    # the previous instruction reaches, and labels no jump refers to. A jump to a label that is
+    # not in the code leaves the program
+
+    def __init__(self):
+        # instructions removed by the last optimize
+        self.removed = 0
+
+    def optimize(self, lines):
+        instructions = [Instruction.parse(line) for line in lines if line != '']
+        count = len(instructions)
+
+        changed = True
+        while changed:
+            changed = False
+            for step in (self.thread_jumps, self.remove_next_jumps, self.remove_unreachable, self.remove_labels):
+                result = step(instructions)
+                changed = changed or result != instructions
+                instructions = result
+
+        self.removed = count - len(instructions)
+        return [instruction.line for instruction in instructions]
+
+    @staticmethod
+    def get_label_indices(instructions):
+        return {instruction.arg: i for i, instruction in enumerate(instructions) if instruction.op == LABEL}
+
+    @staticmethod
+    def skip_labels(instructions, i):
+        # index of the first instruction from i on that is not a label
+        while i < len(instructions) and instructions[i].op == LABEL:
+            i += 1
+        return i
+
+    def thread_jumps(self, instructions):
+        label_indices = self.get_label_indices(instructions)
+        # labels of one place are replaced by the first of them
+        first_labels = {}
+        for i, instruction in enumerate(instructions):
+            if instruction.op == LABEL:
+                previous = instructions[i - 1] if i > 0 else None
+                first_labels[instruction.arg] = first_labels[previous.arg] \
+                    if previous is not None and previous.op == LABEL else instruction.arg
+
+        result = []
+
+        for instruction in instructions:
+            if instruction.op in JUMP_OPS:
+                target = instruction.arg
+                seen = {target}
+
+                # a conditional jump goes on through the same jump, the accumulator is not changed
+                while target in label_indices:
+                    j = self.skip_labels(instructions, label_indices[target])
+                    if j == len(instructions):
+                        break
+
+                    next_instruction = instructions[j]
+                    if next_instruction.op not in ('JMP', instruction.op) or next_instruction.arg in seen:
+                        break
+
+                    target = next_instruction.arg
+                    seen.add(target)
+
+                target = first_labels.get(target, target)
+                if target != instruction.arg:
+                    instruction = Instruction.parse(instruction.op + ' ' + target)
+
+            result.append(instruction)
+
+        return result
+
+    def remove_next_jumps(self, instructions):
+        result = []
+
+        for i, instruction in enumerate(instructions):
+            if instruction.op in JUMP_OPS:
+                following = self.skip_labels(instructions, i + 1)
+                if any(label.arg == instruction.arg for label in instructions[i + 1:following]):
+                    continue
+
+            result.append(instruction)
+
+        return result
+
+    def remove_unreachable(self, instructions):
+        label_indices = self.get_label_indices(instructions)
+        reached = [False] * len(instructions)
+        indices_stack = [0]
+
+        while len(indices_stack) > 0:
+            i = indices_stack.pop()
+            if i >= len(instructions) or reached[i]:
+                continue
+
+            reached[i] = True
+            instruction = instructions[i]
+
+            if instruction.op in JUMP_OPS and instruction.arg in label_indices:
+                indices_stack.append(label_indices[instruction.arg])
+            if instruction.op not in ('JMP', 'HLT'):
+                indices_stack.append(i + 1)
+
+        return [instruction for i, instruction in enumerate(instructions) if reached[i]]
+
+    @staticmethod
+    def remove_labels(instructions):
+        targets = {instruction.arg for instruction in instructions if instruction.op in JUMP_OPS}
+        return [instruction for instruction in instructions if instruction.op != LABEL or instruction.arg in targets]
+
+
+class AsmOptimizer:
+    # Runs the peephole and the jump optimizer until neither removes anything, as removed jumps
+    # and labels join windows of the peephole optimizer
+
+    def __init__(self, temporaries=('R1', '499')):
+        self.peephole_optimizer = PeepholeOptimizer(temporaries)
+        self.jump_optimizer = JumpOptimizer()
+        # instructions before and after the last optimize
+        self.count = 0
+        self.optimized_count = 0
+
+    @property
+    def removed(self):
+        return self.count - self.optimized_count
+
+    def optimize(self, lines):
+        lines = [line for line in lines if line != '']
+        self.count = len(lines)
+
+        while True:
+            lines = self.peephole_optimizer.optimize(lines)
+            lines = self.jump_optimizer.optimize(lines)
+
+            if self.jump_optimizer.removed == 0:
+                break
+
+        self.optimized_count = len(lines)
+        return lines
+
+    def get_report(self):
+        if self.count == 0:
+            return "Optimizer removed 0 instructions"
+
+        return "Optimizer removed {} of {} instructions ({:.0%}), {} left".format(
+            self.removed, self.count, self.removed / self.count, self.optimized_count)
+
+
+if __name__ == '__main__':
+    # optimizes an assembly file and reports the number of removed instructions
+    filename = sys.argv[1] if len(sys.argv) > 1 else "main.asm"
+
+    with open(filename) as f:
+        lines = f.read().split('\n')
+
+    optimizer = AsmOptimizer()
+    print("\n".join(optimizer.optimize(lines)))
+    print(optimizer.get_report(), file=sys.stderr)
@@ -1,6 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from semanticanalyzer import get_constant_type, get_operation_type, TYPE_INTEGER, TYPE_BOOLEAN
+from syntaxtree import Block, Assignment, Switch, Case, For, While, Input, Output, BinaryOp, Identifier
+
+# Dispatch of a switch with integer case constants. The machine has no indirect jump, so there
+# are no jump tables: a switch on an integer expression with at least SWITCH_TREE_MIN_CASES cases
+# goes down a balanced decision tree, which splits the sorted constants at their middle one with
+#   RD value / SUB #lowest / DIV #(middle - lowest) / JZ lower_half
+# This relies on DIV of integers giving 0 exactly for 0 <= dividend < divisor, which holds with
+# rounding both toward zero and down. A value below the lowest constant takes any way, as the
+# leaves compare the value with their constants. Fewer cases are compared one after another.
+SWITCH_TREE_MIN_CASES = 8
+# cases compared one after another at a leaf of the decision tree
+SWITCH_LEAF_CASES = 3
+
 
 class AsmSyntax:
 
@@ -13,6 +27,15 @@ class AsmSyntax:
     def get_tmp_mem(self):
         return self.tmp_mem
 
+    def get_switch_mem(self):
+        # the value a switch dispatches on, no expression is computed during the dispatch
+        return self.get_spill_mem(0)
+
+    def get_spill_mem(self, level):
+        # cells below the temporary cell keep the operands spilled by expression code, one cell
+        # for every level of nesting
+        return self.tmp_mem - 1 - level
+
     def get_mem_for_id(self, i):
         if i in self.id_mem:
             return self.id_mem[i]
@@ -106,6 +129,9 @@ class AsmSyntax:
     def wr_mem(self, mem):
         return "WR " + str(mem)
 
+    def push(self):
+        return "WR R1\nPUSH R1"
+
     def push_constant(self, constant):
         return self.rd_constant(constant) + "\nWR R1\nPUSH R1"
 
@@ -163,6 +189,9 @@ class SwitchToken:
     def __init__(self, insert_pos):
         self.insert_pos = insert_pos
         self.end_label = FutureLabel()
+        # comparisons of the cases. The list itself is placed in the POLIZ at insert_pos and is
+        # replaced by its items, the last case first, when the POLIZ is complete
+        self.cmp_tokens = []
 
     def __repr__(self):
         return "<switch insert_pos={} end={}>".format(self.insert_pos, self.end_label)
@@ -173,6 +202,9 @@ class SwitchToken:
     def get_end_label(self):
         return self.end_label
 
+    def add_case(self, cmp_token):
+        self.cmp_tokens.append(cmp_token)
+
 
 class ForToken:
 
@@ -243,11 +275,123 @@ class CmpToken:
         return "SUB #{}\nJZ {}\nADD #{}".format(self.constant, str(self.je_label), self.constant)
 
 
+class ExpressionCodeGenerator:
+    # Code that leaves the value of an expression tree in the accumulator without the stack. An
+    # identifier or a constant is used as the operand of the operation, a right operand with
+    # operations of its own is computed first and spilled to a cell, and the operands of + and *
+    # are swapped when that needs fewer cells (Sethi-Ullman numbering).
+
+    OPERATIONS = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div', '!=': 'sub'}
+    COMMUTATIVE_OPERATORS = ('+', '*')
+
+    def __init__(self, asm_syntax):
+        self.asm_syntax = asm_syntax
+
+    @staticmethod
+    def is_leaf(node):
+        return type(node) is not BinaryOp
+
+    def get_operand(self, node):
+        # kind of the operand for the method names of AsmSyntax and the operand itself
+        if type(node) is Identifier:
+            return 'mem', self.asm_syntax.get_mem_for_id(node.name)
+        elif node.value in ('true', 'false'):
+            return 'constant', 1 if node.value == 'true' else 0
+        else:
+            return 'constant', node.value
+
+    def get_spill_counts(self, expression):
+        # cells needed by every operation of the expression, by id of its node, or None when an
+        # operator has no instruction of the machine
+        spill_counts = {}
+        nodes_stack = [(expression, False)]
+
+        while len(nodes_stack) > 0:
+            node, operands_done = nodes_stack.pop()
+
+            if self.is_leaf(node):
+                continue
+            elif node.op not in self.OPERATIONS:
+                return None
+            elif not operands_done:
+                nodes_stack += [(node, True), (node.right, False), (node.left, False)]
+                continue
+
+            left = spill_counts.get(id(node.left), 0)
+            right = spill_counts.get(id(node.right), 0)
+
+            if self.is_leaf(node.right):
+                count = left
+            elif self.is_leaf(node.left) and node.op in self.COMMUTATIVE_OPERATORS:
+                count = right
+            elif node.op in self.COMMUTATIVE_OPERATORS:
+                count = min(max(right, left + 1), max(left, right + 1))
+            else:
+                count = max(right, left + 1)
+
+            spill_counts[id(node)] = count
+
+        return spill_counts
+
+    def generate(self, expression):
+        # returns the commands of the expression, or None when it has an operator without an
+        # instruction
+        spill_counts = self.get_spill_counts(expression)
+        if spill_counts is None:
+            return None
+
+        asm_cmds = []
+        # nodes to compute into the accumulator with their spill level, and finished commands
+        tasks = [(expression, 0)]
+
+        while len(tasks) > 0:
+            node, level = tasks.pop()
+
+            if type(node) is str:
+                asm_cmds.append(node)
+                continue
+
+            if self.is_leaf(node):
+                kind, operand = self.get_operand(node)
+                asm_cmds.append(getattr(self.asm_syntax, 'rd_' + kind)(operand))
+                continue
+
+            operation = self.OPERATIONS[node.op]
+            left = node.left
+            right = node.right
+            commutative = node.op in self.COMMUTATIVE_OPERATORS
+
+            if commutative and self.is_leaf(left) and not self.is_leaf(right):
+                left, right = right, left
+
+            if self.is_leaf(right):
+                kind, operand = self.get_operand(right)
+                tasks += [(getattr(self.asm_syntax, operation + '_' + kind)(operand), level), (left, level)]
+                continue
+
+            if commutative and spill_counts.get(id(left), 0) > spill_counts.get(id(right), 0):
+                left, right = right, left
+
+            # the right operand waits in the cell of this level while the left one is computed
+            mem = self.asm_syntax.get_spill_mem(level)
+            tasks += [
+                (getattr(self.asm_syntax, operation + '_mem')(mem), level),
+                (left, level + 1),
+                (self.asm_syntax.wr_mem(mem), level),
+                (right, level)
+            ]
+
+        return asm_cmds
+
+
 class AsmTranslator:
 
-    def __init__(self, constants, identifiers):
+    def __init__(self, constants, identifiers, scope=None):
         self.constants = constants
         self.identifiers = identifiers
+        # semanticanalyzer.Scope of a program that passed the type checker. With it the code of
+        # integer operations with a constant and of literal assignments is specialized by type
+        self.scope = scope
         self.input_priority = {
             "=" : 100,
             "(" : 100,
@@ -298,13 +442,82 @@ class AsmTranslator:
             "/" : 12,
         }
         self.asm_syntax = AsmSyntax()
+        self.expression_generator = ExpressionCodeGenerator(self.asm_syntax)
 
     def to_asm(self, token_list):
-        poliz = self.to_poliz(token_list)
+        return self.poliz_to_asm(self.to_poliz(token_list))
+
+    def tree_to_asm(self, tree):
+        return self.poliz_to_asm(self.tree_to_poliz(tree))
+
+    def poliz_to_asm(self, poliz):
         asm_cmds = []
         current_stack = []
+        # for the values in current_stack: their types, None without a scope, and the indices in
+        # asm_cmds of the commands that pushed them
+        stack_types = []
+        push_indices = []
+
+        def push_value(value, value_type, cmd):
+            current_stack.append(value)
+            stack_types.append(value_type)
+            push_indices.append(len(asm_cmds))
+            asm_cmds.append(cmd)
+
+        def pop_values(count):
+            del current_stack[-count:]
+            del stack_types[-count:]
+            del push_indices[-count:]
+
+        def is_pushed_last(i=-1):
+            # the value was pushed by the last command, nothing has used the stack since
+            return push_indices[i] == len(asm_cmds) - 1
+
+        def is_literal(value):
+            return value in self.constants or type(value) is int
+
+        def get_read(value):
+            # reads a constant or an identifier into the accumulator
+            if value in self.identifiers:
+                return self.asm_syntax.rd_mem(self.asm_syntax.get_mem_for_id(value))
+            else:
+                return self.asm_syntax.rd_constant(value)
+
+        def append_immediate_op_to(cmd_list, op, result_type):
+            # integer operation with a constant right operand: the constant is an immediate operand
+            # instead of being pushed and popped, and a left operand pushed right before is read
+            # directly
+            constant = current_stack[-1]
+            del cmd_list[-1]
+
+            if is_pushed_last(-2) and (current_stack[-2] in self.identifiers or is_literal(current_stack[-2])):
+                cmd_list[-1] = get_read(current_stack[-2])
+            else:
+                cmd_list.append(self.asm_syntax.pop())
+
+            if op == "-":
+                cmd_list.append(self.asm_syntax.sub_constant(constant))
+            elif op == "*":
+                cmd_list.append(self.asm_syntax.mul_constant(constant))
+            elif op == "/":
+                cmd_list.append(self.asm_syntax.div_constant(constant))
+            else:
+                cmd_list.append(self.asm_syntax.add_constant(constant))
+
+            pop_values(2)
+            push_value("tmp", result_type, self.asm_syntax.push())
+
+        def append_bin_op_to(cmd_list, op, operator=None):
+            # operator: operator of the source when op only computes it
+            result_type = None
+            if self.scope is not None:
+                result_type = get_operation_type(operator or op, stack_types[-2], stack_types[-1])
+
+                if stack_types[-2] == TYPE_INTEGER and stack_types[-1] == TYPE_INTEGER and \
+                        current_stack[-1] in self.constants and is_pushed_last():
+                    append_immediate_op_to(cmd_list, op, result_type)
+                    return
 
-        def append_bin_op_to(cmd_list, op):
             op_cmd = self.asm_syntax.add_mem(self.asm_syntax.get_tmp_mem())
             if op == "-":
                 op_cmd = self.asm_syntax.sub_mem(self.asm_syntax.get_tmp_mem())
@@ -317,35 +530,48 @@ class AsmTranslator:
                 self.asm_syntax.pop_mem(self.asm_syntax.get_tmp_mem()),
                 self.asm_syntax.pop(),
                 op_cmd,
-                self.asm_syntax.wr_mem(self.asm_syntax.get_tmp_mem()),
-                self.asm_syntax.push_mem(self.asm_syntax.get_tmp_mem())
+                self.asm_syntax.wr_mem(self.asm_syntax.get_tmp_mem())
             ]:
                 cmd_list.append(i)
-            current_stack.pop()
-            current_stack.pop()
-            current_stack.append("tmp")
+            pop_values(2)
+            push_value("tmp", result_type, self.asm_syntax.push_mem(self.asm_syntax.get_tmp_mem()))
 
         for i, cmd in enumerate(poliz):
             if cmd in self.constants:
-                current_stack.append(cmd)
-                asm_cmds.append(self.asm_syntax.push_constant(cmd))
+                constant_type = None if self.scope is None else get_constant_type(cmd)
+                push_value(cmd, constant_type, self.asm_syntax.push_constant(cmd))
             elif cmd in self.identifiers:
-                current_stack.append(cmd)
-                asm_cmds.append(self.asm_syntax.push_mem(self.asm_syntax.get_mem_for_id(cmd)))
+                identifier_type = None if self.scope is None else self.scope.lookup(cmd).type_name
+                push_value(cmd, identifier_type, self.asm_syntax.push_mem(self.asm_syntax.get_mem_for_id(cmd)))
             elif type(cmd) is str and cmd in "+-*/":
                 append_bin_op_to(asm_cmds, cmd)
             elif cmd == "!=":
-                append_bin_op_to(asm_cmds, "-")
+                append_bin_op_to(asm_cmds, "-", cmd)
             elif cmd == "=":
                 identifier = current_stack[-2]
-                asm_cmds += [
-                    self.asm_syntax.pop_mem(self.asm_syntax.get_tmp_mem()),
-                    self.asm_syntax.pop(),
-                    self.asm_syntax.rd_mem(self.asm_syntax.get_tmp_mem()),
-                    self.asm_syntax.wr_mem(self.asm_syntax.get_mem_for_id(identifier))
-                ]
-                current_stack.pop()
-                current_stack.pop()
+                mem = self.asm_syntax.get_mem_for_id(identifier)
+
+                if self.scope is not None and is_literal(current_stack[-1]) and is_pushed_last() and \
+                        stack_types[-1] == stack_types[-2]:
+                    # a literal of the type of the identifier is written without the stack, the
+                    # identifier pushed before it is not needed
+                    value_read = get_read(current_stack[-1])
+                    del asm_cmds[-1]
+
+                    if is_pushed_last(-2):
+                        del asm_cmds[-1]
+                    else:
+                        asm_cmds.append(self.asm_syntax.pop())
+
+                    asm_cmds += [value_read, self.asm_syntax.wr_mem(mem)]
+                else:
+                    asm_cmds += [
+                        self.asm_syntax.pop_mem(self.asm_syntax.get_tmp_mem()),
+                        self.asm_syntax.pop(),
+                        self.asm_syntax.rd_mem(self.asm_syntax.get_tmp_mem()),
+                        self.asm_syntax.wr_mem(mem)
+                    ]
+                pop_values(2)
             elif type(cmd) is FutureLabel or type(cmd) is AsmLabel:
                 asm_cmds.append(str(cmd) + ":")
             elif type(cmd) is JmpToken or type(cmd) is JzToken or type(cmd) is CmpToken:
@@ -354,10 +580,14 @@ class AsmTranslator:
                 constant = 0
                 if cmd == "true":
                     constant = 1
-                current_stack.append(constant)
-                asm_cmds.append(self.asm_syntax.push_constant(constant))
+                push_value(constant, None if self.scope is None else TYPE_BOOLEAN,
+                           self.asm_syntax.push_constant(constant))
             elif cmd == "let":
                 continue
+            elif self.scope is not None and cmd == self.asm_syntax.pop() and len(current_stack) > 0 and \
+                    stack_types[-1] == TYPE_BOOLEAN and type(current_stack[-1]) is int and is_pushed_last():
+                # a boolean literal taken as a condition is read without the stack
+                asm_cmds[-1] = self.asm_syntax.rd_constant(current_stack[-1])
             elif type(cmd) is str:
                 asm_cmds.append(cmd)
             else:
@@ -369,33 +599,53 @@ class AsmTranslator:
     def to_poliz(self, token_list):
         result_list = []
         op_stack = []
+        # switches in op_stack, the nearest one last
+        switch_stack = []
+        # the token list is read through a cursor and is not changed
+        position = 0
+        # number of the case comparisons and of their lists in result_list, to get positions in the
+        # complete POLIZ
+        case_count = 0
+        switch_count = 0
+
+        def pop_op():
+            op = op_stack.pop()
+            if type(op) is SwitchToken:
+                switch_stack.pop()
+            return op
+
+        def get_nearest_switch():
+            if len(switch_stack) > 0:
+                return switch_stack[-1]
+            else:
+                return None
 
         def pop_until(x, extra_pop=True):
             while len(op_stack) > 0 and op_stack[-1] != x:
-                result_list.append(op_stack.pop())
+                result_list.append(pop_op())
             if extra_pop and len(op_stack) > 0:
-                op_stack.pop()
+                pop_op()
 
         def pop_until_any_of(*x, types=list(), extra_pop=True):
             while len(op_stack) > 0 and (op_stack[-1] not in x and type(op_stack[-1]) not in types):
-                result_list.append(op_stack.pop())
+                result_list.append(pop_op())
             if extra_pop and len(op_stack) > 0:
-                op_stack.pop()
+                pop_op()
 
-        while len(token_list) > 0:
-            # print("STEP", result_list, op_stack, token_list[0].value, sep='\n')
-            current_token = token_list[0]
+        while position < len(token_list):
+            # print("STEP", result_list, op_stack, token_list[position].value, sep='\n')
+            current_token = token_list[position]
             current_value = current_token.value
 
             # IDs, CONSTANTs
             if current_value not in self.input_priority:
                 result_list.append(current_value)
-                token_list.pop(0)
+                position += 1
 
             elif current_value in (")", "loop", ";", "}", "end", ":", "case", "for"):
                 if current_value == ")":
                     pop_until("(")
-                    token_list.pop(0)
+                    position += 1
                 elif current_value == "loop":
                     pop_until_any_of([], types=[WhileToken], extra_pop=False)
                     # finish while
@@ -405,34 +655,26 @@ class AsmTranslator:
                     result_list.append(JmpToken(w.get_while_label()))
                     result_list.append(end_while_label)
 
-                    token_list.pop(0)
+                    position += 1
                 elif current_value == ";" or current_value == "end":
                     pop_until_any_of("while", "case", "=", types=[ForToken, SwitchToken, WhileToken], extra_pop=False)
                     if len(op_stack) > 0 and type(op_stack[-1]) is not WhileToken:
-                        result_list.append(op_stack.pop())
-                    token_list.pop(0)
+                        result_list.append(pop_op())
+                    position += 1
                 elif current_value == "case":
-                    token_list.pop(0) # case
-                    # find nearest "<switch>"
-                    s = None
-                    for t in reversed(op_stack):
-                        if type(t) is SwitchToken:
-                            s = t
-                            break
+                    position += 1 # case
+                    s = get_nearest_switch()
                     pop_until(s, extra_pop=False)
                     result_list.append(JmpToken(s.get_end_label()))
                     case_label = self.asm_syntax.get_label_for("case")
-                    constant = token_list.pop(0).value
+                    constant = token_list[position].value
+                    position += 1
                     result_list.append(AsmLabel(case_label))
-                    result_list.insert(s.get_insert_pos(), CmpToken(constant, case_label))
+                    s.add_case(CmpToken(constant, case_label))
+                    case_count += 1
 
                 elif current_value == "}":
-                    # find nearest "<switch>"
-                    s = None
-                    for t in reversed(op_stack):
-                        if type(t) is SwitchToken:
-                            s = t
-                            break
+                    s = get_nearest_switch()
                     if s is not None:
                         pop_until_any_of(s, "{", extra_pop=False)
 
@@ -447,12 +689,12 @@ class AsmTranslator:
                     else:
                         # no "<switch>"
                         pop_until("{")
-                    token_list.pop(0)
+                    position += 1
                 elif current_value == ":":
-                    token_list.pop(0)
+                    position += 1
                 elif current_value == "for":
-                    for_tokens = token_list[:7]
-                    token_list = token_list[7:]
+                    for_tokens = token_list[position:position + 7]
+                    position += 7
                     mem = self.asm_syntax.get_mem_for_id(for_tokens[1].value)
                     const1 = for_tokens[3].value
                     const2 = for_tokens[5].value
@@ -473,21 +715,25 @@ class AsmTranslator:
                         stack_priority = self.op_stack_priority[last_op]
 
                     if current_priority > stack_priority:
-                        token_list.pop(0)
+                        position += 1
                         op_stack.append(current_value)
 
                     else:
-                        result_list.append(op_stack.pop())
+                        result_list.append(pop_op())
 
                 else:
-                    token_list.pop(0)
+                    position += 1
                     op_stack.append(current_value)
 
             if op_stack[-2:] == ["switch", "{"]:
                 op_stack.pop() # {
                 op_stack.pop() # switch
                 result_list.append(self.asm_syntax.pop())
-                op_stack.append(SwitchToken(len(result_list)))
+                s = SwitchToken(len(result_list) - switch_count + case_count)
+                result_list.append(s.cmp_tokens)
+                switch_count += 1
+                op_stack.append(s)
+                switch_stack.append(s)
             if current_value == ";" and len(op_stack) > 0 and type(op_stack[-1]) is ForToken:
                 # finish for
                 f = op_stack.pop()
@@ -506,14 +752,223 @@ class AsmTranslator:
 
             if len(op_stack) > 0 and type(op_stack[-1]) is WhileToken and current_value == ";":
                 # after condition
-                # find nearest "<while>"
-                w = None
-                for t in reversed(op_stack):
-                    if type(t) is WhileToken:
-                        w = t
-                        break
+                w = op_stack[-1]
                 result_list.append(self.asm_syntax.pop())
                 result_list.append(JzToken(w.get_end_while_label()))
 
-        # print(result_list, op_stack, list(map(lambda x: x.value, token_list)), sep='\n')
+        # print(result_list, op_stack, list(map(lambda x: x.value, token_list[position:])), sep='\n')
+
+        # put the comparisons of the cases in place of their lists
+        poliz = []
+        for item in result_list:
+            if type(item) is list:
+                poliz += reversed(item)
+            else:
+                poliz.append(item)
+
+        return poliz
+
+    def tree_to_poliz(self, tree):
+        # POLIZ of a syntax tree from syntaxtree.build_tree. It is the POLIZ to_poliz gives for the
+        # tokens of the program body, except that every operator is complete: an operator is
+        # finished by the end of its parent, not by the next ';' or 'end', and that assignments,
+        # switches and loop conditions with expressions ExpressionCodeGenerator can compute are
+        # finished code
+        result_list = []
+        self._append_statements_poliz(tree.body.statements, result_list)
         return result_list
+
+    def _append_statements_poliz(self, statements, result_list):
+        # the statements are walked with a stack so that deeply nested ones do not reach the
+        # recursion limit. nodes_stack: statements as (statement, result list, None), the ends of
+        # switches and loops as (statement, result list, its state) and the cases as (case, result
+        # list of the cases, state of the switch)
+        nodes_stack = [(statement, result_list, None) for statement in reversed(statements)]
+
+        while len(nodes_stack) > 0:
+            self._append_statement_poliz(*nodes_stack.pop(), nodes_stack)
+
+    def _append_statement_poliz(self, node, result_list, state, nodes_stack):
+        # appends the code of the statement up to its nested statements, which are pushed to
+        # nodes_stack with the end of the statement under them
+        node_type = type(node)
+
+        if node_type is Assignment:
+            mem = self.asm_syntax.get_mem_for_id(node.target.name)
+            expression_cmds = self.expression_generator.generate(node.value)
+
+            if expression_cmds is not None:
+                result_list.append("\n".join(expression_cmds + [self.asm_syntax.wr_mem(mem)]))
+                return
+
+            if node.let:
+                result_list.append("let")
+            result_list.append(node.target.name)
+            self._append_expression_poliz(node.value, result_list)
+            result_list.append("=")
+
+        elif node_type is Block:
+            nodes_stack += [(statement, result_list, None) for statement in reversed(node.statements)]
+
+        elif node_type is Switch and state is None:
+            self._append_condition_poliz(node.expression, result_list)
+
+            # the dispatch goes before the code of the cases. state: constants of the cases with
+            # their labels, the code of the cases and the label of the end
+            state = ([], [], FutureLabel())
+            nodes_stack.append((node, result_list, state))
+            nodes_stack += [(case, state[1], state) for case in reversed(node.cases)]
+
+        elif node_type is Switch:
+            case_labels, cases_list, end_label = state
+            self._append_switch_dispatch(node.expression, case_labels, end_label, result_list)
+            result_list += cases_list
+            end_label.set_label(AsmLabel(self.asm_syntax.get_label_for("switch_end")))
+            result_list.append(end_label.get_label())
+
+        elif node_type is Case:
+            case_labels, _, end_label = state
+            result_list.append(JmpToken(end_label))
+            case_label = self.asm_syntax.get_label_for("case")
+            result_list.append(AsmLabel(case_label))
+            case_labels.append((node.constant.value, case_label))
+            nodes_stack.append((node.body, result_list, None))
+
+        elif node_type is For and state is None:
+            # as in to_poliz, the bounds are written as immediate operands
+            mem = self.asm_syntax.get_mem_for_id(node.assignment.target.name)
+            const1 = node.assignment.value.token.value
+            const2 = node.limit.token.value
+            for_label = AsmLabel(self.asm_syntax.get_label_for("for"))
+            f = ForToken(mem, const1, const2, for_label)
+            result_list.append(self.asm_syntax.mov_constant_to(mem, const1))
+            result_list.append(for_label)
+            result_list.append(CmpToken(const2, f.get_end_for_label()))
+
+            nodes_stack += [(node, result_list, (mem, for_label, f)), (node.body, result_list, None)]
+
+        elif node_type is For:
+            mem, for_label, f = state
+            end_for_label = AsmLabel(self.asm_syntax.get_label_for("end_for"))
+            f.get_end_for_label().set_label(end_for_label)
+            result_list.append(self.asm_syntax.inc_mem(mem))
+            result_list.append(JmpToken(for_label))
+            result_list.append(end_for_label)
+
+        elif node_type is While and state is None:
+            w = WhileToken(AsmLabel(self.asm_syntax.get_label_for("while")))
+            result_list.append(w.get_while_label())
+            self._append_condition_poliz(node.condition, result_list)
+            result_list.append(JzToken(w.get_end_while_label()))
+
+            nodes_stack += [(node, result_list, w), (node.body, result_list, None)]
+
+        elif node_type is While:
+            w = state
+            end_while_label = AsmLabel(self.asm_syntax.get_label_for("end_while"))
+            w.get_end_while_label().set_label(end_while_label)
+            result_list.append(JmpToken(w.get_while_label()))
+            result_list.append(end_while_label)
+
+        elif node_type is Input:
+            # the identifiers with their delimiters, as to_poliz leaves them
+            for i, target in enumerate(node.targets):
+                if i > 0:
+                    result_list.append(",")
+                result_list.append(target.name)
+            result_list.append("readln")
+
+        elif node_type is Output:
+            for i, expression in enumerate(node.expressions):
+                if i > 0:
+                    result_list.append("\\")
+                self._append_expression_poliz(expression, result_list)
+            result_list.append("writeln")
+
+    def _append_switch_dispatch(self, expression, case_labels, end_label, result_list):
+        # jumps to the label of the case with the value in the accumulator, goes on after the
+        # dispatch when there is none. case_labels: constants of the cases with their labels
+        if not all(value.isdigit() for value, _ in case_labels):
+            # the last case first, every comparison restores the value
+            for value, label in reversed(case_labels):
+                result_list.append(CmpToken(value, label))
+            return
+
+        # as with the comparisons of the last case first, the last of the cases with the same
+        # constant is taken
+        labels = {}
+        for value, label in case_labels:
+            labels[int(value)] = label
+        constants = sorted(labels)
+
+        if self.scope is None or expression.type_name != TYPE_INTEGER or len(constants) < SWITCH_TREE_MIN_CASES:
+            result_list += self._get_compare_chain(constants, labels)
+            return
+
+        mem = self.asm_syntax.get_switch_mem()
+        result_list.append(self.asm_syntax.wr_mem(mem))
+
+        # ranges of the sorted constants with the label of their code, the upper half of a range
+        # follows its split and the lower half comes after all the code of the upper one
+        ranges_stack = [(0, len(constants), None)]
+        while len(ranges_stack) > 0:
+            start, end, label = ranges_stack.pop()
+
+            if label is not None:
+                result_list.append(self.asm_syntax.make_label(label))
+
+            if end - start <= SWITCH_LEAF_CASES:
+                result_list.append(self.asm_syntax.rd_mem(mem))
+                result_list += self._get_compare_chain(constants[start:end], labels)
+
+                # the last leaf goes on after the dispatch
+                if len(ranges_stack) > 0:
+                    result_list.append(JmpToken(end_label))
+                continue
+
+            middle = (start + end) // 2
+            lower_label = self.asm_syntax.get_label_for("switch_lower")
+            result_list.append(self.asm_syntax.rd_mem(mem))
+            if constants[start] != 0:
+                result_list.append(self.asm_syntax.sub_constant(constants[start]))
+            result_list.append(self.asm_syntax.div_constant(constants[middle] - constants[start]))
+            result_list.append(self.asm_syntax.jz_label(lower_label))
+            ranges_stack += [(start, middle, lower_label), (middle, end, None)]
+
+    def _get_compare_chain(self, constants, labels):
+        # comparisons with the sorted constants, the accumulator keeps the value less the
+        # constant compared last
+        asm_cmds = []
+        previous = 0
+
+        for constant in constants:
+            if constant != previous:
+                asm_cmds.append(self.asm_syntax.sub_constant(constant - previous))
+            asm_cmds.append(self.asm_syntax.jz_label(labels[constant]))
+            previous = constant
+
+        return asm_cmds
+
+    def _append_condition_poliz(self, expression, result_list):
+        # the value of the expression is left in the accumulator
+        expression_cmds = self.expression_generator.generate(expression)
+
+        if expression_cmds is not None:
+            result_list.append("\n".join(expression_cmds))
+        else:
+            self._append_expression_poliz(expression, result_list)
+            result_list.append(self.asm_syntax.pop())
+
+    @staticmethod
+    def _append_expression_poliz(expression, result_list):
+        # operators follow their operands, the expression is walked with a stack so that long
+        # chains of operators do not reach the recursion limit
+        nodes_stack = [(expression, False)]
+
+        while len(nodes_stack) > 0:
+            node, operands_done = nodes_stack.pop()
+
+            if type(node) is BinaryOp and not operands_done:
+                nodes_stack += [(node, True), (node.right, False), (node.left, False)]
+            else:
+                result_list.append(node.token.value)
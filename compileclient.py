@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Client of the compile server: sends the given files to the server over one connection and
+# writes the assembly code of every file next to it, with the extension replaced by .asm.
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+from compileprotocol import DEFAULT_SOCKET_PATH, DEFAULT_OUTPUTS
+
+
+class CompileClient:
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.file = self.socket.makefile('rwb')
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def compile_all(self, sources, outputs=DEFAULT_OUTPUTS, window=16):
+        # sources: list of source strings, returns the responses in the same order. At most window
+        # requests are sent ahead of the responses, so that neither side blocks on a full socket
+        responses = [None] * len(sources)
+        sent = 0
+
+        for received in range(len(sources)):
+            while sent < len(sources) and sent - received < window:
+                request = {'id': sent, 'source': sources[sent], 'outputs': list(outputs)}
+                self.file.write(json.dumps(request).encode('utf-8') + b'\n')
+                sent += 1
+            self.file.flush()
+
+            line = self.file.readline()
+            if not line:
+                raise ConnectionError("compile server closed the connection")
+
+            response = json.loads(line)
+            if response.get('id') is None:
+                raise ValueError(response['errors'][0]['message'])
+            responses[response['id']] = response
+
+        return responses
+
+    def compile(self, source, outputs=DEFAULT_OUTPUTS):
+        return self.compile_all([source], outputs)[0]
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description="ZLang compile server client")
+    arg_parser.add_argument('files', nargs='+', help="ZLang source files")
+    arg_parser.add_argument('-s', '--socket', default=DEFAULT_SOCKET_PATH, help="path of the server Unix socket")
+    arg_parser.add_argument('--tokens', action='store_true', help="print the tokens")
+    arg_parser.add_argument('--tree', action='store_true', help="print the syntax tree")
+    args = arg_parser.parse_args()
+
+    outputs = list(DEFAULT_OUTPUTS)
+    if args.tokens:
+        outputs.append('tokens')
+    if args.tree:
+        outputs.append('tree')
+
+    sources = []
+    for filename in args.files:
+        with open(filename) as f:
+            sources.append(f.read())
+
+    client = CompileClient(args.socket)
+    try:
+        responses = client.compile_all(sources, outputs)
+    finally:
+        client.close()
+
+    failed = False
+    for filename, response in zip(args.files, responses):
+        if 'tokens' in response:
+            print(" ".join(token[0] for token in response['tokens']))
+
+        if 'tree' in response:
+            print(response['tree'])
+
+        for error in response['errors']:
+            print("{}: {}".format(filename, error['message']))
+
+        if 'asm' in response:
+            with open(os.path.splitext(filename)[0] + '.asm', 'w') as f:
+                f.write(response['asm'])
+
+        failed = failed or not response['ok']
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Protocol of the compile server, shared by the server and the client. It imports nothing from
+# the compiler, so the client starts without loading it.
+#
+# Every request and response is one line of JSON. Request:
+#   {"id": 1, "source": "program ...", "outputs": ["tokens", "tree", "asm"]}
+# Response:
+#   {"id": 1, "ok": true, "errors": [], "tokens": [...], "tree": "...", "asm": "..."}
+# "outputs" defaults to ["asm"]. Responses on one connection may come in any order, they are
+# matched to the requests by "id".
+
+import os
+import tempfile
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'zlang-{}.sock'.format(os.getuid()))
+
+# longest request line, sources are sent inside the request
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+DEFAULT_OUTPUTS = ('asm', )
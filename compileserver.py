@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Compile server: keeps compilers with built grammar tables in a pool of worker processes and
+# accepts compile requests over a Unix domain socket. The protocol is described in
+# compileprotocol.py.
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from compileprotocol import DEFAULT_SOCKET_PATH, MAX_REQUEST_SIZE, DEFAULT_OUTPUTS
+from main import Compiler, format_error
+
+# compiled by every worker at start
+WARM_UP_SOURCE = 'program var a1b : integer; begin a1b = 1 end.'
+
+compiler = None
+
+
+def init_worker():
+    # builds the grammar tables once per worker process
+    global compiler
+    compiler = Compiler()
+
+
+def error_to_dict(kind, e, message):
+    line, pos = e.get_line_pos()
+    return {'kind': kind, 'type': type(e).__name__, 'line': line, 'pos': pos, 'message': message}
+
+
+def compile_source(source, outputs=DEFAULT_OUTPUTS):
+    result = compiler.compile(source, keep_tokens='tokens' in outputs)
+    response = {'ok': result.error is None and result.semantic_error is None, 'errors': []}
+
+    if result.error is not None:
+        response['errors'].append(error_to_dict('syntax', result.error, format_error(result.error)))
+
+    if result.semantic_error is not None:
+        e = result.semantic_error
+        response['errors'].append(error_to_dict('semantic', e, "Semantic error: {}".format(e)))
+
+    if 'tokens' in outputs and result.token_list is not None:
+        response['tokens'] = [[token.value, token.table, token.index, list(token.pos)] for token in result.token_list]
+
+    if 'tree' in outputs and result.program_node is not None:
+        response['tree'] = result.program_node.to_format_str()
+
+    if 'asm' in outputs and result.asm is not None:
+        response['asm'] = result.asm
+
+    return response
+
+
+class CompileServer:
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, workers=None, max_pending=None):
+        self.socket_path = socket_path
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        # requests waiting for a worker or being compiled, reading stops when the limit is reached
+        self.max_pending = 2 * self.workers if max_pending is None else max_pending
+        self.executor = None
+        self.pending = None
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker)
+        self.pending = asyncio.Semaphore(self.max_pending)
+
+        try:
+            # starts the workers before the first request arrives
+            await asyncio.gather(*[
+                loop.run_in_executor(self.executor, compile_source, WARM_UP_SOURCE) for _ in range(self.workers)
+            ])
+
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+            server = await asyncio.start_unix_server(self.handle_client, self.socket_path, limit=MAX_REQUEST_SIZE)
+
+            stop = loop.create_future()
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signal_number, lambda: stop.done() or stop.set_result(None))
+
+            async with server:
+                await stop
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle_client(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the request is longer than MAX_REQUEST_SIZE
+                    await self.send(writer, write_lock, {'id': None, 'ok': False, 'errors': [
+                        {'kind': 'request', 'message': 'request is too long'}
+                    ]})
+                    break
+
+                if not line:
+                    break
+
+                await self.pending.acquire()
+                task = asyncio.create_task(self.handle_request(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, line, writer, write_lock):
+        try:
+            try:
+                request = json.loads(line)
+                request_id = request.get('id')
+                source = request['source']
+                outputs = tuple(request.get('outputs', DEFAULT_OUTPUTS))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                response = {'id': None, 'ok': False, 'errors': [
+                    {'kind': 'request', 'message': 'invalid request'}
+                ]}
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    response = await loop.run_in_executor(self.executor, compile_source, source, outputs)
+                except Exception as e:
+                    response = {'ok': False, 'errors': [
+                        {'kind': 'internal', 'type': type(e).__name__, 'message': str(e)}
+                    ]}
+                response['id'] = request_id
+        finally:
+            self.pending.release()
+
+        await self.send(writer, write_lock, response)
+
+    @staticmethod
+    async def send(writer, write_lock, response):
+        async with write_lock:
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description="ZLang compile server")
+    arg_parser.add_argument('-s', '--socket', default=DEFAULT_SOCKET_PATH, help="path of the Unix socket")
+    arg_parser.add_argument('-w', '--workers', type=int, default=None, help="number of worker processes")
+    arg_parser.add_argument('--max-pending', type=int, default=None,
+                            help="number of requests compiled or waiting for a worker at once")
+    args = arg_parser.parse_args()
+
+    asyncio.run(CompileServer(args.socket, args.workers, args.max_pending).serve())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Constant folding and propagation over a syntax tree checked by the type checker. Operations
+# with constant operands are computed, and identifiers with a known value are replaced by it.
+# Values are known from assignments of constants in straight-line code: they are forgotten for
+# the variables a loop assigns from its head on, for the targets of readln, and after a switch
+# for the variables whose values differ between its cases.
+#
+# A result is folded only when it can be written as a constant of the source: integers and reals
+# that are not negative, reals without an exponent, and true or false. An integer division is
+# folded only when it is exact, as the rounding of DIV is up to the machine.
+
+import re
+from lexicalanalyzer import Token, SymbolTable
+from semanticanalyzer import TYPE_INTEGER, TYPE_REAL, TYPE_BOOLEAN
+from syntaxtree import TreeVisitor, Block, Assignment, Switch, For, While, Input, Output, BinaryOp, Identifier, \
+    Constant
+
+REAL_CONSTANT_REGEX = re.compile(r'\d+\.\d+')
+
+
+class AssignedNames(TreeVisitor):
+    # names of the variables the statements of a tree assign
+
+    def __init__(self):
+        self.names = set()
+
+    def visit_Assignment(self, node):
+        self.names.add(node.target.name)
+        return False
+
+    def visit_Input(self, node):
+        self.names.update(target.name for target in node.targets)
+        return False
+
+
+def get_assigned_names(node):
+    visitor = AssignedNames()
+    visitor.walk(node)
+    return visitor.names
+
+
+def get_python_value(value, type_name):
+    if type_name == TYPE_BOOLEAN:
+        return value == 'true'
+    elif type_name == TYPE_INTEGER:
+        return int(value)
+    else:
+        return float(value)
+
+
+def get_constant_value(result, type_name):
+    # the constant of the source for a computed value, None when there is none
+    if type_name == TYPE_BOOLEAN:
+        return 'true' if result else 'false'
+    elif type_name == TYPE_INTEGER:
+        return str(result) if result >= 0 else None
+
+    value = repr(float(result))
+    return value if REAL_CONSTANT_REGEX.fullmatch(value) else None
+
+
+def compute(op, left, right, type_name):
+    # value of the operation, None when it is not folded
+    if type_name == TYPE_REAL:
+        left = float(left)
+        right = float(right)
+
+    if op == '+':
+        return left + right
+    elif op == '-':
+        return left - right
+    elif op == '*':
+        return left * right
+    elif op == '/':
+        if right == 0 or type_name == TYPE_INTEGER and left % right != 0:
+            return None
+        return left // right if type_name == TYPE_INTEGER else left / right
+    elif op == '<':
+        return left < right
+    elif op == '<=':
+        return left <= right
+    elif op == '>':
+        return left > right
+    elif op == '>=':
+        return left >= right
+    elif op == '==':
+        return left == right
+    elif op == '!=':
+        return left != right
+
+    return None
+
+
+class ConstantFolder:
+
+    def __init__(self, lexical_parser):
+        # constants of the source with the new ones, for the translator. The symbol table of the
+        # lexical parser keeps the constants of the source only
+        self.constants = SymbolTable(lexical_parser.constants)
+        self.keywords = lexical_parser.keywords
+        # operations and identifiers replaced by constants
+        self.folded = 0
+
+    def fold(self, tree):
+        self.fold_statements(tree.body.statements, {})
+        return tree
+
+    def make_constant(self, value, type_name, node):
+        # constant node in place of node, with the position of its token
+        if type_name == TYPE_BOOLEAN:
+            token = Token(Token.TYPE_KEYWORD, self.keywords.index(value), node.token.pos, value)
+        else:
+            token = Token(Token.TYPE_CONST, self.constants.add(value), node.token.pos, value)
+
+        constant = Constant(token)
+        constant.type_name = type_name
+        self.folded += 1
+        return constant
+
+    def fold_operation(self, node):
+        left = node.left
+        right = node.right
+
+        if type(left) is not Constant or type(right) is not Constant or node.type_name is None:
+            return node
+
+        # the operands of an order or equality operator are compared as the wider of their types
+        operand_type = TYPE_REAL if TYPE_REAL in (left.type_name, right.type_name) else left.type_name
+        result = compute(node.op, get_python_value(left.value, left.type_name),
+                         get_python_value(right.value, right.type_name),
+                         node.type_name if node.type_name != TYPE_BOOLEAN else operand_type)
+        if result is None:
+            return node
+
+        value = get_constant_value(result, node.type_name)
+        if value is None:
+            return node
+
+        return self.make_constant(value, node.type_name, node)
+
+    def fold_expression(self, expression, values):
+        # returns the expression with its constant operations computed. values: known values of
+        # variables by name, with their types
+        folded = {}
+        nodes_stack = [(expression, False)]
+
+        while len(nodes_stack) > 0:
+            node, operands_done = nodes_stack.pop()
+            node_type = type(node)
+
+            if node_type is BinaryOp:
+                if not operands_done:
+                    nodes_stack += [(node, True), (node.right, False), (node.left, False)]
+                    continue
+
+                node.left = folded.pop(id(node.left))
+                node.right = folded.pop(id(node.right))
+                folded[id(node)] = self.fold_operation(node)
+            elif node_type is Identifier and node.name in values:
+                folded[id(node)] = self.make_constant(*values[node.name], node)
+            else:
+                folded[id(node)] = node
+
+        return folded[id(expression)]
+
+    def fold_statements(self, statements, values):
+        # folds the statements and changes values to the values after them. nodes_stack: the
+        # statements with the values they change, the ends of the cases as (None, case values,
+        # values after the switch) and the ends of the switches as (switch, values, values after it)
+        nodes_stack = [(statement, values, None) for statement in reversed(statements)]
+
+        while len(nodes_stack) > 0:
+            node, values, joined = nodes_stack.pop()
+
+            if joined is None:
+                self.fold_statement(node, values, nodes_stack)
+            elif node is None:
+                # values after the switch are the ones every case and the way past all of them agree on
+                for name, value in list(joined.items()):
+                    if values.get(name) != value:
+                        del joined[name]
+            else:
+                values.clear()
+                values.update(joined)
+
+    def fold_statement(self, node, values, nodes_stack):
+        # folds the expressions of the statement, pushes its nested statements to nodes_stack
+        node_type = type(node)
+
+        if node_type is Assignment:
+            self.fold_assignment(node, values)
+
+        elif node_type is Block:
+            nodes_stack += [(statement, values, None) for statement in reversed(node.statements)]
+
+        elif node_type is Switch:
+            node.expression = self.fold_expression(node.expression, values)
+            joined = dict(values)
+            nodes_stack.append((node, values, joined))
+
+            for case in reversed(node.cases):
+                case_values = dict(values)
+                nodes_stack += [(None, case_values, joined), (case.body, case_values, None)]
+
+        elif node_type is For:
+            # the bounds are computed once, before the loop
+            node.assignment.value = self.fold_expression(node.assignment.value, values)
+            node.limit = self.fold_expression(node.limit, values)
+            self.forget(values, get_assigned_names(node.body) | {node.assignment.target.name})
+            nodes_stack.append((node.body, dict(values), None))
+
+        elif node_type is While:
+            # the condition is computed at the loop head, where the values of the body meet
+            self.forget(values, get_assigned_names(node.body))
+            node.condition = self.fold_expression(node.condition, values)
+            nodes_stack.append((node.body, dict(values), None))
+
+        elif node_type is Input:
+            self.forget(values, [target.name for target in node.targets])
+
+        elif node_type is Output:
+            node.expressions = [self.fold_expression(expression, values) for expression in node.expressions]
+
+    def fold_assignment(self, node, values):
+        node.value = self.fold_expression(node.value, values)
+        name = node.target.name
+
+        # a value converted by the assignment is not kept
+        if type(node.value) is Constant and node.value.type_name == node.target.type_name:
+            values[name] = (node.value.value, node.value.type_name)
+        else:
+            values.pop(name, None)
+
+    @staticmethod
+    def forget(values, names):
+        for name in names:
+            values.pop(name, None)
@@ -82,3 +82,18 @@ class UndefinedIdentifierError(ParseError):
 
     def get_name(self):
         return self.name
+
+
+class TypeMismatchError(ParseError):
+
+    def __init__(self, operation, types, line, pos):
+        super(TypeMismatchError, self).__init__(
+            line,
+            pos,
+            "types {} do not match in '{}' at {}".format(', '.join(types), operation, (line, pos))
+        )
+        self.operation = operation
+        self.types = types
+
+    def get_types(self):
+        return self.types
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Front end that lexes, parses and collects the declarations in one pass over the source. The
+# parser pulls every token from the lexer when it needs it, so the tokens are not collected into a
+# list first, and the declarations are entered into the scope when the parser creates their
+# nodes. The result is the syntax tree, which the back end translates without the tokens.
+
+import io
+from exceptions import SyntaxPrecedenceError, SyntaxRuleError
+from lexicalanalyzer import LexicalParser
+from semanticanalyzer import Scope
+from syntaxanalyzer import SyntaxAnalyzer, GrammarNode
+from syntaxtree import build_tree
+
+BOOLEAN_CONSTANTS = ('true', 'false')
+
+
+class ConstantSet:
+    # Constants of a lexical parser together with the boolean literals. The table of the lexical
+    # parser is not copied, so the constants found while the source is being read are members.
+
+    def __init__(self, constants):
+        self.constants = constants
+
+    def __contains__(self, value):
+        return value in self.constants or value in BOOLEAN_CONSTANTS
+
+
+class ParsedProgram:
+
+    def __init__(self, lexical_parser, program_node, tree, scope):
+        self.lexical_parser = lexical_parser
+        self.program_node = program_node
+        self.tree = tree
+        # semanticanalyzer.Scope with the declarations of the program
+        self.scope = scope
+
+
+def is_declaration_node(node):
+    # TYPE_DEFINITION ::= ID_N : TYPE, unlike CASE_CONTENT ::= CONSTANT : OPERATOR it starts with a node
+    content = node.content
+    return len(content) == 3 and content[1].value == ':' and type(content[0]) is GrammarNode
+
+
+class FrontEnd:
+
+    def __init__(self, keywords, identifier_regex, syntax_analyzer=None, **lexer_options):
+        self.keywords = keywords
+        self.identifier_regex = identifier_regex
+        self.lexer_options = lexer_options
+        self.syntax_analyzer = SyntaxAnalyzer() if syntax_analyzer is None else syntax_analyzer
+
+    def create_lexical_parser(self):
+        # symbol tables belong to one source, every source needs its own lexical parser
+        return LexicalParser(list(self.keywords), self.identifier_regex, **self.lexer_options)
+
+    def parse(self, source, lexical_parser=None, token_list=None):
+        # source: string, file object or file path. token_list, when given, gets the tokens as
+        # they are read. Lexical errors of the whole source are reported before syntax errors.
+        if lexical_parser is None:
+            lexical_parser = self.create_lexical_parser()
+
+        if isinstance(source, str):
+            source = io.StringIO(source)
+
+        tokens = lexical_parser.iter_tokens(source)
+        if token_list is not None:
+            tokens = self._collect(tokens, token_list)
+
+        scope = Scope()
+
+        def declare(node):
+            if is_declaration_node(node):
+                type_name = node.content[2].content[0].value
+                nodes_stack = [node.content[0]]
+
+                # ID_N ::= ID | ID , ID_N
+                while len(nodes_stack) > 0:
+                    for item in nodes_stack.pop().content:
+                        if type(item) is GrammarNode:
+                            nodes_stack.append(item)
+                        elif item.value != ',':
+                            scope.declare(item.value, type_name, item.pos)
+
+        try:
+            nodes = self.syntax_analyzer.parse(
+                tokens,
+                ConstantSet(lexical_parser.constants),
+                lexical_parser.keywords,
+                lexical_parser.identifiers,
+                lexical_parser.delimiters,
+                on_reduce=declare
+            )
+        except (SyntaxPrecedenceError, SyntaxRuleError):
+            # the rest of the source is read for its lexical errors
+            for _ in tokens:
+                pass
+            raise
+
+        program_node = nodes[1]
+        return ParsedProgram(lexical_parser, program_node, build_tree(program_node), scope)
+
+    @staticmethod
+    def _collect(tokens, token_list):
+        for token in tokens:
+            token_list.append(token)
+            yield token
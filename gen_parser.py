@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Генератор синтаксического анализатора: коды терминалов, матрицы отношений предшествования
+# и правила остовной грамматики записываются в модуль в виде литералов, поэтому при импорте
+# сгенерированного модуля грамматика не строится
+
+from gen_tables import Grammar, get_grammar_hash, START_NON_TERMINAL, RELATION_NONE, RELATION_LESS, RELATION_EQUAL, \
+    RELATION_GREATER
+
+OUT_FILENAME = 'generated_parser.py'
+
+# нетерминалы, из которых может выводиться разбираемая цепочка
+GOALS = [START_NON_TERMINAL, 'OPERATOR']
+
+# код нетерминала в правых частях правил и в стеке анализатора
+NON_TERMINAL_CODE = -1
+
+CONSTANT_TERMINAL = 'CONSTANT'
+IDENTIFIER_TERMINAL = 'ID'
+
+HEADER = '''#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Generated by gen_parser.py from the grammar in gen_tables.py, do not edit.
+# Run `python3 gen_parser.py` after changing the grammar.
+
+from lexicalanalyzer import Token
+from syntaxanalyzer import GrammarNode
+from exceptions import SyntaxPrecedenceError, SyntaxRuleError
+from gen_tables import get_grammar_hash
+
+GRAMMAR_HASH = {grammar_hash!r}
+
+TERMINALS = {terminals!r}
+
+BEGIN_TERMINAL = {begin_terminal!r}
+END_TERMINAL = {end_terminal!r}
+START_NON_TERMINAL = {start_non_terminal!r}
+
+TERMINAL_CODES = {terminal_codes}
+
+CONSTANT_CODE = {constant_code}
+IDENTIFIER_CODE = {identifier_code}
+EDGE_CODE = {edge_code}
+NON_TERMINAL_CODE = {non_terminal_code}
+
+WIDTH = {width}
+
+# precedence relations, row * WIDTH + column: {relation_names}
+RELATIONS = {{
+{relations}}}
+
+# skeleton rules: terminal codes of the right-hand side (NON_TERMINAL_CODE for a non-terminal) -> left side
+RULES = {{
+{rules}}}
+'''
+
+PARSER = '''
+
+class GeneratedSyntaxAnalyzer:
+
+    def __init__(self):
+        # the tables are only valid for the grammar they were generated from
+        if GRAMMAR_HASH != get_grammar_hash():
+            raise RuntimeError(
+                "generated_parser.py is out of date with the grammar in gen_tables.py, run `python3 gen_parser.py`"
+            )
+        self.stack = []
+
+    def parse(self, token_list, constants, keywords, ids, delimiters, goal=None):
+        relations = RELATIONS[START_NON_TERMINAL if goal is None else goal]
+        terminal_codes = TERMINAL_CODES
+        rules = RULES
+
+        begin_token = Token(0, 0, (0, 0), BEGIN_TERMINAL)
+        begin_token.terminal = EDGE_CODE
+        end_token = Token(0, 0, (0, 0), END_TERMINAL)
+        end_token.terminal = EDGE_CODE
+
+        # codes[i] is the terminal code of stack[i], top is the index of the top terminal
+        stack = self.stack = [begin_token]
+        codes = [EDGE_CODE]
+        top = 0
+
+        token_count = len(token_list)
+        for i in range(token_count + 1):
+            if i < token_count:
+                token = token_list[i]
+                value = token.value
+
+                if value in constants:
+                    code = CONSTANT_CODE
+                elif value in ids:
+                    code = IDENTIFIER_CODE
+                elif value in terminal_codes:
+                    code = terminal_codes[value]
+                else:
+                    raise ValueError("'{{}}' is not a terminal".format(value))
+
+                token.terminal = code
+            else:
+                token = end_token
+                code = EDGE_CODE
+
+            while True:
+                if top == 0 and token is end_token:
+                    return stack
+
+                relation = relations[codes[top] * WIDTH + code]
+
+                if relation == {relation_less} or relation == {relation_equal}:
+                    stack.append(token)
+                    codes.append(code)
+                    top = len(stack) - 1
+                    break
+                elif relation == {relation_greater}:
+                    # the basis starts at the leftmost terminal of a chain of terminals related by '='
+                    first = top
+                    while True:
+                        previous = first - 1 if codes[first - 1] != NON_TERMINAL_CODE else first - 2
+                        if relations[codes[previous] * WIDTH + codes[first]] != {relation_equal}:
+                            break
+                        first = previous
+
+                    if codes[first - 1] == NON_TERMINAL_CODE:
+                        first -= 1
+
+                    left = rules.get(tuple(codes[first:]))
+                    if left is None:
+                        raise SyntaxRuleError(*stack[first].pos)
+
+                    node = GrammarNode(None, left, stack[first:])
+                    del stack[first:]
+                    del codes[first:]
+                    top = first - 1
+                    stack.append(node)
+                    codes.append(NON_TERMINAL_CODE)
+                else:
+                    raise SyntaxPrecedenceError(*token.pos)
+'''
+
+
+def format_literal_rows(rows, indent=4):
+    return ''.join(' ' * indent + row + ',\n' for row in rows)
+
+
+def generate(grammar):
+    terminals = grammar.terminals
+    terminal_codes = grammar.terminal_codes
+    width = len(terminals) + 1
+
+    relation_rows = []
+    for goal in GOALS:
+        matrix = grammar.get_relation_matrix(goal)
+        # строка матрицы на строку файла, литералы байтов склеиваются при компиляции
+        lines = ''.join(
+            '\n        {!r}'.format(matrix[i * width:(i + 1) * width]) for i in range(width)
+        )
+        relation_rows.append('{!r}: ({}\n    )'.format(goal, lines))
+
+    rules = {}
+    for rule in grammar.skeleton_rules:
+        right = tuple(
+            terminal_codes[symbol] if symbol in terminal_codes else NON_TERMINAL_CODE for symbol in rule.right
+        )
+        # как и при поиске по списку правил, используется первое правило с данной правой частью
+        rules.setdefault(right, rule.left)
+
+    rule_rows = ['{!r}: {!r}'.format(right, left) for right, left in rules.items()]
+
+    relation_codes = {
+        'relation_less': RELATION_LESS,
+        'relation_equal': RELATION_EQUAL,
+        'relation_greater': RELATION_GREATER,
+    }
+
+    header = HEADER.format(
+        grammar_hash=get_grammar_hash(),
+        terminals=tuple(terminals),
+        begin_terminal=grammar.begin_terminal,
+        end_terminal=grammar.end_terminal,
+        start_non_terminal=grammar.start_non_terminal,
+        terminal_codes='{\n' + format_literal_rows(
+            '{!r}: {}'.format(terminal, code) for terminal, code in terminal_codes.items()
+        ) + '}',
+        constant_code=terminal_codes[CONSTANT_TERMINAL],
+        identifier_code=terminal_codes[IDENTIFIER_TERMINAL],
+        edge_code=terminal_codes[grammar.begin_terminal],
+        non_terminal_code=NON_TERMINAL_CODE,
+        width=width,
+        relation_names='{} none, {} <, {} =, {} >'.format(
+            RELATION_NONE, RELATION_LESS, RELATION_EQUAL, RELATION_GREATER
+        ),
+        relations=format_literal_rows(relation_rows),
+        rules=format_literal_rows(rule_rows),
+    )
+
+    return header + PARSER.format(**relation_codes)
+
+
+if __name__ == '__main__':
+    source = generate(Grammar.load())
+
+    try:
+        with open(OUT_FILENAME, 'w') as f:
+            f.write(source)
+    except IOError:
+        print("ERROR: Can't write to file '{}'".format(OUT_FILENAME))
+    else:
+        print("DONE: Parser has been written to file '{}'".format(OUT_FILENAME))
@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
+import os
+import pickle
+import tempfile
+from array import array
+from copy import deepcopy
+
 # список терминальных символов
 TERMINALS = 'program var begin end . : ; ID , integer real boolean { } = let switch case for to do while loop readln writeln + - * / ( ) CONSTANT < <= > >= == != \\'.split(' ')
 
@@ -42,13 +49,63 @@ SKELETON_NON_TERMINAL = 'S'
 
 OUT_FILENAME = 'operator-precedence-table.csv'
 
+# способы построения таблиц: битовые маски множеств символов или исходный вариант на списках.
+# Таблица предшествования и список конфликтов получаются одинаковыми
+ENGINE_BITSET = 'bitset'
+ENGINE_LISTS = 'lists'
+
+# коды отношений предшествования в матрице отношений, ячейки с несколькими значениями считаются пустыми
+RELATION_NONE = 0
+RELATION_LESS = 1
+RELATION_EQUAL = 2
+RELATION_GREATER = 3
+
+RELATION_CODES = {' ': RELATION_NONE, '<': RELATION_LESS, '=': RELATION_EQUAL, '>': RELATION_GREATER}
+
+# кэш вычисленных таблиц, пересоздаётся при изменении грамматики
+CACHE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar-cache.pickle')
+
+# увеличивается при изменении формата кэша или алгоритма построения таблиц
+CACHE_VERSION = 2
+
 if BEGIN_TERMINAL in TERMINALS or END_TERMINAL in TERMINALS:
     raise ValueError("BEGIN_TERMINAL and END_TERMINAL should NOT be in TERMINALS")
 
 GRAMMAR = GRAMMAR.strip()
 
 
-from copy import deepcopy
+def get_grammar_hash():
+    key = (CACHE_VERSION, TERMINALS, GRAMMAR, START_NON_TERMINAL, BEGIN_TERMINAL, END_TERMINAL,
+           SKELETON_NON_TERMINAL)
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def get_function_relation(f_value, g_value):
+    if f_value < g_value:
+        return RELATION_LESS
+    elif f_value > g_value:
+        return RELATION_GREATER
+    else:
+        return RELATION_EQUAL
+
+
+def get_terminal_codes():
+    # номер строки и столбца таблицы предшествования для каждого терминала,
+    # терминалы начала и конца цепочки имеют общий номер
+    terminal_codes = {terminal: i for i, terminal in enumerate(TERMINALS)}
+    terminal_codes[BEGIN_TERMINAL] = len(TERMINALS)
+    terminal_codes[END_TERMINAL] = len(TERMINALS)
+    return terminal_codes
+
+
+def get_rules_by_right(rules):
+    # индекс правил по правой части, при совпадении правых частей используется первое правило
+    rules_by_right = {}
+
+    for rule in rules:
+        rules_by_right.setdefault(tuple(rule.right), rule)
+
+    return rules_by_right
 
 
 class GrammarRule:
@@ -83,11 +140,12 @@ class GrammarRule:
 
 class Grammar:
 
-    def __init__(self, calc_print=False):
+    def __init__(self, calc_print=False, engine=ENGINE_BITSET):
         self.terminals = TERMINALS
         self.start_non_terminal = START_NON_TERMINAL
         self.begin_terminal = BEGIN_TERMINAL
         self.end_terminal = END_TERMINAL
+        self.terminal_codes = get_terminal_codes()
 
         # генерация правил по текстовому представлению грамматики
         self.rules = []
@@ -156,6 +214,7 @@ class Grammar:
             new_skeleton_rules.append(rule)
 
         self.skeleton_rules = new_skeleton_rules
+        self.skeleton_rules_by_right = get_rules_by_right(self.skeleton_rules)
 
         if calc_print:
             print("Skeleton rules:")
@@ -166,6 +225,231 @@ class Grammar:
             print("Non-terminals found: {}\n{}".format(len(NON_TERMINALS), NON_TERMINALS))
             print('\n', end='')
 
+        if engine == ENGINE_LISTS:
+            tables = self._calc_tables_lists()
+        else:
+            tables = self._calc_tables_bitset()
+
+        leftmost_and_rightmost_nt, leftmost_and_rightmost_t, op_table, multiple_value_cells = tables
+        self.leftmost_and_rightmost_nt = leftmost_and_rightmost_nt
+        self.leftmost_and_rightmost_t = leftmost_and_rightmost_t
+
+        # порядок ячеек с несколькими значениями не зависит от способа построения
+        multiple_value_cells.sort()
+
+        if calc_print:
+            print("Non-terminal Leftmost and Rightmost symbols")
+            for u, row in leftmost_and_rightmost_nt.items():
+                print(u, 'L ' + str(row['l']), 'R ' + str(row['r']), sep='\n', end='\n' + '*' * 80 + '\n')
+            print('\n', end='')
+
+            print("Terminal Leftmost and Rightmost symbols")
+            for u, row in leftmost_and_rightmost_t.items():
+                print(u, 'Lt ' + str(row['l']), 'Rt ' + str(row['r']), sep='\n', end='\n' + '*' * 80 + '\n')
+            print('\n', end='')
+
+        self.op_table = op_table
+        self.multiple_value_cells = multiple_value_cells
+        self.goal_op_tables = {START_NON_TERMINAL: op_table}
+        self.relation_matrices = {}
+        self.precedence_functions = {}
+        # print(str(op_table).replace('], ', '],\n '))
+
+        str_op_table = deepcopy(op_table)
+
+        for i, row in enumerate(str_op_table):
+            if i < len(TERMINALS):
+                row.insert(0, TERMINALS[i])
+            else:
+                row.insert(0, BEGIN_TERMINAL)
+
+        str_op_table.insert(0, [' '] + TERMINALS + [END_TERMINAL])
+
+        if calc_print:
+            try:
+                with open(OUT_FILENAME, "w") as f:
+                    for row in str_op_table:
+                        f.write(";".join(map(lambda x: '"{}"'.format(x), row)) + '\n')
+            except IOError:
+                print("ERROR: Can't write to file '{}'".format(OUT_FILENAME))
+
+            else:
+                print("DONE: Operator precedence table has been written to file '{}'".format(OUT_FILENAME))
+
+                if len(multiple_value_cells) > 0:
+                    print()
+                    print("WARNING: Table contains cells with multiple values!\nConflicts should be solved manually!\n")
+
+                    print("List of cells with multiple values:")
+
+                    str_cells = []
+                    for i, j in multiple_value_cells:
+                        str_cells.append("('{}' '{}')".format(TERMINALS[i], TERMINALS[j]))
+
+                    print(" ".join(str_cells))
+
+            f, g, filled_rows, not_linearized_cells = self.get_precedence_functions()
+            width = len(TERMINALS) + 1
+
+            print()
+            print("Precedence functions:")
+            for i, symbol in enumerate(TERMINALS + [BEGIN_TERMINAL + '/' + END_TERMINAL]):
+                print("{}: f = {}, g = {}".format(symbol, f[i], g[i]))
+
+            if len(not_linearized_cells) > 0:
+                print()
+                print("WARNING: Some cells cannot be linearized, they are kept apart from the functions:")
+
+                str_cells = []
+                for k, relation in sorted(not_linearized_cells.items()):
+                    row = (TERMINALS + [BEGIN_TERMINAL])[k // width]
+                    col = (TERMINALS + [END_TERMINAL])[k % width]
+                    str_cells.append("('{}' '{}')".format(row, col))
+
+                print(" ".join(str_cells))
+
+    def _calc_tables_bitset(self):
+        # построение таблиц по битовым маскам: символ с номером k - бит 1 << k,
+        # терминалы нумеруются как в TERMINALS, нетерминалы следуют за ними
+        n = len(TERMINALS)
+        symbols = TERMINALS + self.non_terminals
+        codes = {symbol: k for k, symbol in enumerate(symbols)}
+        terminals_mask = (1 << n) - 1
+
+        def iter_bits(mask):
+            while mask:
+                low_bit = mask & -mask
+                yield low_bit.bit_length() - 1
+                mask ^= low_bit
+
+        def to_symbols(mask):
+            return [symbols[k] for k in iter_bits(mask)]
+
+        # L и R: крайние левые и правые символы, Lt и Rt: крайние левые и правые терминалы
+        l_masks = [0] * len(symbols)
+        r_masks = [0] * len(symbols)
+        lt_masks = [0] * len(symbols)
+        rt_masks = [0] * len(symbols)
+
+        # начальное заполнение
+        for rule in self.rules:
+            u = codes[rule.left]
+            l_masks[u] |= 1 << codes[rule.leftmost_symbol()]
+            r_masks[u] |= 1 << codes[rule.rightmost_symbol()]
+
+            symbol = rule.leftmost_terminal()
+            if symbol is not None:
+                lt_masks[u] |= 1 << codes[symbol]
+
+            symbol = rule.rightmost_terminal()
+            if symbol is not None:
+                rt_masks[u] |= 1 << codes[symbol]
+
+        # транзитивное замыкание по Уоршеллу, у терминалов нет исходящих дуг
+        non_terminal_codes = range(n, len(symbols))
+        for masks in (l_masks, r_masks):
+            for k in non_terminal_codes:
+                k_bit = 1 << k
+                k_mask = masks[k]
+
+                for u in non_terminal_codes:
+                    if masks[u] & k_bit:
+                        masks[u] |= k_mask
+
+        # Lt(U) - начальные Lt самого U и всех нетерминалов из L(U), аналогично Rt
+        for masks, t_masks in ((l_masks, lt_masks), (r_masks, rt_masks)):
+            start_t_masks = t_masks[:]
+
+            for u in non_terminal_codes:
+                for k in iter_bits(masks[u] & ~terminals_mask):
+                    t_masks[u] |= start_t_masks[k]
+
+        leftmost_and_rightmost_nt = {}
+        leftmost_and_rightmost_t = {}
+        for non_terminal in self.non_terminals:
+            u = codes[non_terminal]
+            leftmost_and_rightmost_nt[non_terminal] = {'l': to_symbols(l_masks[u]), 'r': to_symbols(r_masks[u])}
+            leftmost_and_rightmost_t[non_terminal] = {'l': to_symbols(lt_masks[u]), 'r': to_symbols(rt_masks[u])}
+
+        # отношения: строка i содержит маску столбцов j, для которых ai = aj (ai < aj, ai > aj)
+        eq_rows = [0] * (n + 1)
+        lt_rows = [0] * (n + 1)
+        gt_rows = [0] * (n + 1)
+
+        # символы основы, с тем же порядком обхода, что и в find_basis_symbols: следующий после ai терминал,
+        # иначе терминал через один символ, после которого следующее вхождение ai пропускается
+        for rule in self.rules:
+            right = rule.right
+            skip_to = {}
+
+            for pos, ai in enumerate(right):
+                if codes[ai] >= n or pos < skip_to.get(ai, 0):
+                    continue
+
+                i = codes[ai]
+                skip_to[ai] = pos + 1
+
+                if pos + 1 < len(right):
+                    next_code = codes[right[pos + 1]]
+
+                    if next_code < n and not eq_rows[i] & (1 << next_code):
+                        eq_rows[i] |= 1 << next_code
+                    elif pos + 2 < len(right):
+                        after_next_code = codes[right[pos + 2]]
+
+                        if after_next_code < n and not eq_rows[i] & (1 << after_next_code):
+                            eq_rows[i] |= 1 << after_next_code
+                            skip_to[ai] = pos + 2
+
+        # ai < Lt(U) для U сразу после ai, Rt(U) > ai для U сразу перед ai
+        for rule in self.rules:
+            right = rule.right
+
+            for pos in range(len(right) - 1):
+                code = codes[right[pos]]
+                next_code = codes[right[pos + 1]]
+
+                if code < n and next_code >= n:
+                    lt_rows[code] |= lt_masks[next_code]
+                elif code >= n and next_code < n:
+                    for j in iter_bits(rt_masks[code]):
+                        gt_rows[j] |= 1 << next_code
+
+        lt_rows[n] |= lt_masks[codes[START_NON_TERMINAL]]
+        for j in iter_bits(rt_masks[codes[START_NON_TERMINAL]]):
+            gt_rows[j] |= 1 << n
+
+        # Значения ячейки записываются в том же порядке, что и в исходном способе: '=' и '<' строки i
+        # заносятся при обходе ai, '>' столбца j - при обходе aj
+        op_table = []
+        multiple_value_cells = []
+
+        for i in range(n + 1):
+            row = []
+            for j in range(n + 1):
+                bit = 1 << j
+                value = ''
+
+                if gt_rows[i] & bit and j < i:
+                    value += '>'
+                if eq_rows[i] & bit:
+                    value += '='
+                if lt_rows[i] & bit:
+                    value += '<'
+                if gt_rows[i] & bit and j >= i:
+                    value += '>'
+
+                multiple_value_cells += [(i, j)] * (len(value) - 1)
+                row.append(value or ' ')
+
+            op_table.append(row)
+
+        return leftmost_and_rightmost_nt, leftmost_and_rightmost_t, op_table, multiple_value_cells
+
+    def _calc_tables_lists(self):
+        # построение таблиц по спискам символов
+        NON_TERMINALS = self.non_terminals
+
         def find_rules_with_left(left):
             result = []
 
@@ -219,14 +503,6 @@ class Grammar:
         for lr_key in ('l', 'r'):
             complete_table(leftmost_and_rightmost_nt, lr_key)
 
-        self.leftmost_and_rightmost_nt = leftmost_and_rightmost_nt
-
-        if calc_print:
-            print("Non-terminal Leftmost and Rightmost symbols")
-            for u, row in leftmost_and_rightmost_nt.items():
-                print(u, 'L ' + str(row['l']), 'R ' + str(row['r']), sep='\n', end='\n' + '*' * 80 + '\n')
-            print('\n', end='')
-
         leftmost_and_rightmost_t = {}
 
         for non_terminal in NON_TERMINALS:
@@ -271,14 +547,6 @@ class Grammar:
         for lr_key in ('l', 'r'):
             complete_t_table(leftmost_and_rightmost_nt, lr_key, leftmost_and_rightmost_t)
 
-        self.leftmost_and_rightmost_t = leftmost_and_rightmost_t
-
-        if calc_print:
-            print("Terminal Leftmost and Rightmost symbols")
-            for u, row in leftmost_and_rightmost_t.items():
-                print(u, 'Lt ' + str(row['l']), 'Rt ' + str(row['r']), sep='\n', end='\n' + '*' * 80 + '\n')
-            print('\n', end='')
-
         op_table = []
         for i in range(len(TERMINALS)):
             op_table.append([' '] * len(TERMINALS))
@@ -395,41 +663,188 @@ class Grammar:
             j = TERMINALS.index(symbol)
             set_or_append_op_table(j, i, '>')
 
-        self.op_table = op_table
-        # print(str(op_table).replace('], ', '],\n '))
-
-        str_op_table = deepcopy(op_table)
-
-        for i, row in enumerate(str_op_table):
-            if i < len(TERMINALS):
-                row.insert(0, TERMINALS[i])
-            else:
-                row.insert(0, BEGIN_TERMINAL)
-
-        str_op_table.insert(0, [' '] + TERMINALS + [END_TERMINAL])
-
-        if calc_print:
+        return leftmost_and_rightmost_nt, leftmost_and_rightmost_t, op_table, multiple_value_cells
+
+    @classmethod
+    def load(cls, filename=CACHE_FILENAME):
+        # таблицы берутся из кэша, если он построен для текущей грамматики,
+        # иначе вычисляются заново и кэш перезаписывается
+        grammar_hash = get_grammar_hash()
+
+        # испорченный кэш (обрезанный, с изменёнными байтами) считается отсутствующим,
+        # какое бы исключение ни возникло при его чтении
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+
+            # в начале файла контрольная сумма остальных байтов
+            digest_size = hashlib.sha1().digest_size
+            if hashlib.sha1(data[digest_size:]).digest() != data[:digest_size]:
+                raise ValueError("grammar cache checksum mismatch")
+            state = pickle.loads(data[digest_size:])
+
+            if type(state) is dict and state.get('hash') == grammar_hash:
+                grammar = cls.__new__(cls)
+                grammar._set_state(state)
+                return grammar
+        except Exception:
+            pass
+
+        grammar = cls()
+        grammar.save(filename, grammar_hash)
+        return grammar
+
+    def save(self, filename=CACHE_FILENAME, grammar_hash=None):
+        state = {
+            'hash': get_grammar_hash() if grammar_hash is None else grammar_hash,
+            'rules': [(rule.left, rule.right) for rule in self.rules],
+            'skeleton_rules': [(rule.left, rule.right) for rule in self.skeleton_rules],
+            'non_terminals': self.non_terminals,
+            'leftmost_and_rightmost_nt': self.leftmost_and_rightmost_nt,
+            'leftmost_and_rightmost_t': self.leftmost_and_rightmost_t,
+            'op_table': self.op_table,
+            'multiple_value_cells': self.multiple_value_cells,
+        }
+
+        # запись во временный файл и замена, чтобы другой процесс не прочитал недописанный кэш
+        try:
+            fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(filename) or '.')
             try:
-                with open(OUT_FILENAME, "w") as f:
-                    for row in str_op_table:
-                        f.write(";".join(map(lambda x: '"{}"'.format(x), row)) + '\n')
-            except IOError:
-                print("ERROR: Can't write to file '{}'".format(OUT_FILENAME))
-
-            else:
-                print("DONE: Operator precedence table has been written to file '{}'".format(OUT_FILENAME))
-
-                if len(multiple_value_cells) > 0:
-                    print()
-                    print("WARNING: Table contains cells with multiple values!\nConflicts should be solved manually!\n")
-
-                    print("List of cells with multiple values:")
-
-                    str_cells = []
-                    for i, j in multiple_value_cells:
-                        str_cells.append("('{}' '{}')".format(TERMINALS[i], TERMINALS[j]))
+                data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(hashlib.sha1(data).digest() + data)
+                os.replace(temp_filename, filename)
+            except BaseException:
+                os.unlink(temp_filename)
+                raise
+        except IOError:
+            # без кэша таблицы будут вычисляться при каждом запуске
+            pass
+
+    def _set_state(self, state):
+        self.terminals = TERMINALS
+        self.start_non_terminal = START_NON_TERMINAL
+        self.begin_terminal = BEGIN_TERMINAL
+        self.end_terminal = END_TERMINAL
+        self.terminal_codes = get_terminal_codes()
+        self.rules = [GrammarRule(left, right) for left, right in state['rules']]
+        self.skeleton_rules = [GrammarRule(left, right) for left, right in state['skeleton_rules']]
+        self.skeleton_rules_by_right = get_rules_by_right(self.skeleton_rules)
+        self.non_terminals = state['non_terminals']
+        self.leftmost_and_rightmost_nt = state['leftmost_and_rightmost_nt']
+        self.leftmost_and_rightmost_t = state['leftmost_and_rightmost_t']
+        self.op_table = state['op_table']
+        self.multiple_value_cells = state['multiple_value_cells']
+        self.goal_op_tables = {START_NON_TERMINAL: self.op_table}
+        self.relation_matrices = {}
+        self.precedence_functions = {}
+
+    def get_goal_op_table(self, non_terminal):
+        # таблица для разбора цепочек, выводимых из non_terminal, а не из начального символа:
+        # строка терминала начала и столбец терминала конца заполняются по Lt и Rt non_terminal
+        if non_terminal not in self.goal_op_tables:
+            n = len(self.terminals)
+            op_table = [row[:n] + [' '] for row in self.op_table[:n]]
+            op_table.append([' '] * (n + 1))
+
+            for symbol in self.leftmost_and_rightmost_t[non_terminal]['l']:
+                op_table[n][self.terminals.index(symbol)] = '<'
+
+            for symbol in self.leftmost_and_rightmost_t[non_terminal]['r']:
+                op_table[self.terminals.index(symbol)][n] = '>'
+
+            self.goal_op_tables[non_terminal] = op_table
+
+        return self.goal_op_tables[non_terminal]
+
+    def get_relation_matrix(self, non_terminal=START_NON_TERMINAL):
+        # таблица предшествования в виде строки байтов с кодами отношений:
+        # отношение терминалов с номерами i и j находится в ячейке i * (len(terminals) + 1) + j
+        if non_terminal not in self.relation_matrices:
+            self.relation_matrices[non_terminal] = bytes(
+                RELATION_CODES.get(value, RELATION_NONE)
+                for row in self.get_goal_op_table(non_terminal)
+                for value in row
+            )
+
+        return self.relation_matrices[non_terminal]
+
+    def get_precedence_functions(self, non_terminal=START_NON_TERMINAL):
+        # функции предшествования Флойда f и g: ai < aj => f(ai) < g(aj), ai = aj => f(ai) = g(aj),
+        # ai > aj => f(ai) > g(aj). Возвращаются f, g, заполненные ячейки матрицы (битовая маска
+        # столбцов для каждой строки) и словарь ячеек, которые не удалось линеаризовать:
+        # номер ячейки в матрице отношений -> отношение.
+        # Функции дают отношение для любой пары терминалов, поэтому пустые ячейки (ошибки)
+        # определяются по маскам заполненных ячеек
+        if non_terminal not in self.precedence_functions:
+            relations = self.get_relation_matrix(non_terminal)
+            width = len(self.terminals) + 1
+
+            # вершины графа: f(ai) с номером i и g(aj) с номером width + j,
+            # вершины, связанные отношением '=', объединяются в одну группу
+            groups = list(range(2 * width))
+
+            def find_group(k):
+                while groups[k] != k:
+                    groups[k] = groups[groups[k]]
+                    k = groups[k]
+                return k
+
+            for i in range(width):
+                for j in range(width):
+                    if relations[i * width + j] == RELATION_EQUAL:
+                        groups[find_group(i)] = find_group(width + j)
+
+            # дуга u -> v означает, что значение функции в группе u больше, чем в группе v
+            edges = [set() for _ in range(2 * width)]
+            for i in range(width):
+                for j in range(width):
+                    relation = relations[i * width + j]
+
+                    if relation == RELATION_LESS:
+                        edges[find_group(width + j)].add(find_group(i))
+                    elif relation == RELATION_GREATER:
+                        edges[find_group(i)].add(find_group(width + j))
+
+            # значение функции - длина наибольшего пути из группы, дуги, замыкающие цикл, пропускаются
+            lengths = [None] * (2 * width)
+            for root in range(2 * width):
+                if lengths[root] is not None or find_group(root) != root:
+                    continue
+
+                lengths[root] = -1
+                path = [(root, iter(edges[root]))]
+                while len(path) > 0:
+                    u, u_edges = path[-1]
+
+                    for v in u_edges:
+                        if lengths[v] is None:
+                            lengths[v] = -1
+                            path.append((v, iter(edges[v])))
+                            break
+                    else:
+                        path.pop()
+                        lengths[u] = max([lengths[v] + 1 for v in edges[u] if lengths[v] >= 0], default=0)
+
+            f = array('i', (lengths[find_group(i)] for i in range(width)))
+            g = array('i', (lengths[find_group(width + j)] for j in range(width)))
+
+            filled_rows = [0] * width
+            not_linearized_cells = {}
+            for i in range(width):
+                for j in range(width):
+                    relation = relations[i * width + j]
+
+                    if relation != RELATION_NONE:
+                        filled_rows[i] |= 1 << j
+
+                        if relation != get_function_relation(f[i], g[j]):
+                            not_linearized_cells[i * width + j] = relation
+
+            self.precedence_functions[non_terminal] = f, g, filled_rows, not_linearized_cells
+
+        return self.precedence_functions[non_terminal]
 
-                    print(" ".join(str_cells))
 
 if __name__ == '__main__':
     g = Grammar(True)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Generated by gen_parser.py from the grammar in gen_tables.py, do not edit.
+# Run `python3 gen_parser.py` after changing the grammar.
+
+from lexicalanalyzer import Token
+from syntaxanalyzer import GrammarNode
+from exceptions import SyntaxPrecedenceError, SyntaxRuleError
+from gen_tables import get_grammar_hash
+
+GRAMMAR_HASH = '3493aa3298e19b1f4b2bb7bf02f82a8d08471811'
+
+TERMINALS = ('program', 'var', 'begin', 'end', '.', ':', ';', 'ID', ',', 'integer', 'real', 'boolean', '{', '}', '=', 'let', 'switch', 'case', 'for', 'to', 'do', 'while', 'loop', 'readln', 'writeln', '+', '-', '*', '/', '(', ')', 'CONSTANT', '<', '<=', '>', '>=', '==', '!=', '\\')
+
+BEGIN_TERMINAL = 'BEGIN'
+END_TERMINAL = 'END'
+START_NON_TERMINAL = 'PROGRAM'
+
+TERMINAL_CODES = {
+    'program': 0,
+    'var': 1,
+    'begin': 2,
+    'end': 3,
+    '.': 4,
+    ':': 5,
+    ';': 6,
+    'ID': 7,
+    ',': 8,
+    'integer': 9,
+    'real': 10,
+    'boolean': 11,
+    '{': 12,
+    '}': 13,
+    '=': 14,
+    'let': 15,
+    'switch': 16,
+    'case': 17,
+    'for': 18,
+    'to': 19,
+    'do': 20,
+    'while': 21,
+    'loop': 22,
+    'readln': 23,
+    'writeln': 24,
+    '+': 25,
+    '-': 26,
+    '*': 27,
+    '/': 28,
+    '(': 29,
+    ')': 30,
+    'CONSTANT': 31,
+    '<': 32,
+    '<=': 33,
+    '>': 34,
+    '>=': 35,
+    '==': 36,
+    '!=': 37,
+    '\\': 38,
+    'BEGIN': 39,
+    'END': 39,
+}
+
+CONSTANT_CODE = 31
+IDENTIFIER_CODE = 7
+EDGE_CODE = 39
+NON_TERMINAL_CODE = -1
+
+WIDTH = 40
+
+# precedence relations, row * WIDTH + column: 0 none, 1 <, 2 =, 3 >
+RELATIONS = {
+    'PROGRAM': (
+        b'\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x02\x00\x00\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x02\x00\x00\x01\x01\x00\x00\x00\x00\x01\x00\x00\x01\x01\x00\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03'
+        b'\x00\x00\x00\x00\x00\x00\x03\x01\x00\x01\x01\x01\x01\x03\x00\x01\x01\x03\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x03\x03\x00\x01\x01\x01\x00\x00\x00\x00\x01\x03\x00\x01\x01\x00\x01\x00\x01\x00\x02\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x03\x00\x03\x03\x00\x02\x00\x00\x00\x03\x03\x02\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x03\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x01\x01\x00\x00\x00\x00\x01\x02\x00\x01\x01\x01\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x03\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x01\x03\x00\x01\x01\x03\x01\x00\x01\x02\x03\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x00\x00\x00\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x01\x01\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x01\x01\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x02\x03\x00\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x03\x00'
+        b'\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    ),
+    'OPERATOR': (
+        b'\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x02\x00\x00\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x02\x00\x00\x01\x01\x00\x00\x00\x00\x01\x00\x00\x01\x01\x00\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x01\x00\x01\x01\x01\x01\x03\x00\x01\x01\x03\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x03\x03\x00\x01\x01\x01\x00\x00\x00\x00\x01\x03\x00\x01\x01\x00\x01\x00\x01\x00\x02\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x03\x00\x03\x03\x00\x02\x00\x00\x00\x03\x03\x02\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x03\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x01\x01\x00\x00\x00\x00\x01\x02\x00\x01\x01\x01\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x03\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x03'
+        b'\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x02\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x01\x03\x00\x01\x01\x03\x01\x00\x01\x02\x03\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x03'
+        b'\x00\x00\x00\x00\x00\x00\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x01\x01\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x01\x01\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x01\x03\x01\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x01\x01\x01\x01\x02\x01\x00\x00\x00\x00\x00\x00\x00\x00'
+        b'\x00\x00\x00\x03\x00\x00\x03\x00\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x02\x03\x00\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x03\x03\x03\x03\x00\x03\x00\x03\x03\x03\x03\x03\x03\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x03\x03\x00\x00\x00\x03\x00\x03\x03\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x00\x00\x00\x00\x00\x00\x03\x03'
+        b'\x00\x00\x00\x03\x00\x00\x03\x01\x00\x00\x00\x00\x00\x03\x00\x00\x00\x03\x00\x00\x00\x00\x03\x00\x00\x01\x01\x01\x01\x01\x00\x01\x01\x01\x01\x01\x01\x01\x03\x03'
+        b'\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\x01\x00\x00\x01\x01\x00\x01\x00\x01\x00\x00\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00'
+    ),
+}
+
+# skeleton rules: terminal codes of the right-hand side (NON_TERMINAL_CODE for a non-terminal) -> left side
+RULES = {
+    (0, 1, -1, 2, -1, 3, 4): 'S',
+    (-1, 6): 'S',
+    (-1, 6, -1): 'S',
+    (-1, 5, -1): 'S',
+    (7,): 'S',
+    (7, 8, -1): 'S',
+    (10,): 'S',
+    (9,): 'S',
+    (11,): 'S',
+    (12, -1, 13): 'S',
+    (7, 14, -1): 'S',
+    (15, 7, 14, -1): 'S',
+    (16, -1, 12, -1, 13): 'S',
+    (17, -1): 'S',
+    (-1, 17, -1): 'S',
+    (31, 5, -1): 'S',
+    (18, -1, 19, -1, 20, -1): 'S',
+    (20, 21, -1, 6, -1, 22): 'S',
+    (23, -1): 'S',
+    (24, -1): 'S',
+    (-1, 38, -1): 'S',
+    (-1, 37, -1): 'S',
+    (-1, 36, -1): 'S',
+    (-1, 35, -1): 'S',
+    (-1, 34, -1): 'S',
+    (-1, 33, -1): 'S',
+    (-1, 32, -1): 'S',
+    (-1, 26, -1): 'S',
+    (-1, 25, -1): 'S',
+    (-1, 28, -1): 'S',
+    (-1, 27, -1): 'S',
+    (29, -1, 30): 'S',
+    (31,): 'S',
+}
+
+
+class GeneratedSyntaxAnalyzer:
+
+    def __init__(self):
+        # the tables are only valid for the grammar they were generated from
+        if GRAMMAR_HASH != get_grammar_hash():
+            raise RuntimeError(
+                "generated_parser.py is out of date with the grammar in gen_tables.py, run `python3 gen_parser.py`"
+            )
+        self.stack = []
+
+    def parse(self, token_list, constants, keywords, ids, delimiters, goal=None):
+        relations = RELATIONS[START_NON_TERMINAL if goal is None else goal]
+        terminal_codes = TERMINAL_CODES
+        rules = RULES
+
+        begin_token = Token(0, 0, (0, 0), BEGIN_TERMINAL)
+        begin_token.terminal = EDGE_CODE
+        end_token = Token(0, 0, (0, 0), END_TERMINAL)
+        end_token.terminal = EDGE_CODE
+
+        # codes[i] is the terminal code of stack[i], top is the index of the top terminal
+        stack = self.stack = [begin_token]
+        codes = [EDGE_CODE]
+        top = 0
+
+        token_count = len(token_list)
+        for i in range(token_count + 1):
+            if i < token_count:
+                token = token_list[i]
+                value = token.value
+
+                if value in constants:
+                    code = CONSTANT_CODE
+                elif value in ids:
+                    code = IDENTIFIER_CODE
+                elif value in terminal_codes:
+                    code = terminal_codes[value]
+                else:
+                    raise ValueError("'{}' is not a terminal".format(value))
+
+                token.terminal = code
+            else:
+                token = end_token
+                code = EDGE_CODE
+
+            while True:
+                if top == 0 and token is end_token:
+                    return stack
+
+                relation = relations[codes[top] * WIDTH + code]
+
+                if relation == 1 or relation == 2:
+                    stack.append(token)
+                    codes.append(code)
+                    top = len(stack) - 1
+                    break
+                elif relation == 3:
+                    # the basis starts at the leftmost terminal of a chain of terminals related by '='
+                    first = top
+                    while True:
+                        previous = first - 1 if codes[first - 1] != NON_TERMINAL_CODE else first - 2
+                        if relations[codes[previous] * WIDTH + codes[first]] != 2:
+                            break
+                        first = previous
+
+                    if codes[first - 1] == NON_TERMINAL_CODE:
+                        first -= 1
+
+                    left = rules.get(tuple(codes[first:]))
+                    if left is None:
+                        raise SyntaxRuleError(*stack[first].pos)
+
+                    node = GrammarNode(None, left, stack[first:])
+                    del stack[first:]
+                    del codes[first:]
+                    top = first - 1
+                    stack.append(node)
+                    codes.append(NON_TERMINAL_CODE)
+                else:
+                    raise SyntaxPrecedenceError(*token.pos)
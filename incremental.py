@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from bisect import bisect_left
+from exceptions import ParseError
+from lexicalanalyzer import SymbolTable, Token, LineIndex
+from syntaxanalyzer import SyntaxAnalyzer, GrammarNode
+
+OPERATOR_NON_TERMINAL = 'OPERATOR'
+
+# first tokens of the operators, besides an identifier followed by '='
+OPERATOR_KEYWORDS = ('let', 'switch', 'for', 'do', 'readln', 'writeln', '{')
+
+# tokens that share a line shift when a source is parsed
+LINE_SHIFT_TOKENS = 256
+
+
+def get_first_leaf(node):
+    while type(node) is GrammarNode:
+        node = node.content[0]
+    return node
+
+
+def get_last_leaf(node):
+    while type(node) is GrammarNode:
+        node = node.content[-1]
+    return node
+
+
+def iter_nodes(node):
+    nodes_stack = [node]
+
+    while len(nodes_stack) > 0:
+        current_node = nodes_stack.pop()
+        yield current_node
+
+        if type(current_node) is GrammarNode:
+            nodes_stack += current_node.content
+
+
+def is_operator_list(node):
+    # OPERATOR_N ::= OPERATOR ; OPERATOR_N
+    return type(node) is GrammarNode and len(node.content) == 3 and node.content[1].value == ';'
+
+
+def is_operator_position(parent, i):
+    content = parent.content
+    first_value = content[0].value
+
+    if is_operator_list(parent):
+        return True
+    elif first_value == 'program':
+        return i == 4
+    elif first_value == '{':
+        return i == 1
+    elif first_value == 'for':
+        return i == 5
+    elif first_value == 'do':
+        return i == 4
+    else:
+        # CASE_CONTENT ::= CONSTANT : OPERATOR
+        return len(content) == 3 and content[1].value == ':' and i == 2
+
+
+def is_operator_start(node):
+    first = get_first_leaf(node)
+
+    if first.value in OPERATOR_KEYWORDS:
+        return True
+
+    content = node.content
+    return first.table == Token.TYPE_IDENTIFIER and content[0] is first and len(content) > 1 and \
+        content[1].value == '='
+
+
+class SourceLineIndex(LineIndex):
+    # Line index of an edited source. The newlines behind the last edit are kept without the
+    # length change of that edit and the ones before it, the change is applied to the newlines
+    # between two edits when the next edit comes. An edit costs the number of lines between it
+    # and the previous edit, not the number of lines of the source.
+
+    def __init__(self, source_string):
+        super().__init__()
+        self.add_newlines(source_string)
+        # newlines[pending_first:] are pending_delta characters before their offsets in the source
+        self.pending_first = len(self.newlines)
+        self.pending_delta = 0
+
+    def line_pos(self, offset):
+        line = self._find(offset)
+        line_start = self._get_newline(line - 1) + 1 if line > 0 else 0
+        return line + 1, offset - line_start + 1
+
+    def get_offset(self, pos):
+        line, column = pos
+        line_start = self._get_newline(line - 2) + 1 if line > 1 else 0
+        return line_start + column - 1
+
+    def edit(self, offset, removed_length, inserted_text):
+        first = self._find(offset)
+        last = self._find(offset + removed_length)
+        self._apply_pending(last)
+
+        inserted = LineIndex()
+        inserted.add_newlines(inserted_text, offset)
+        self.newlines[first:last] = inserted.newlines
+        self.pending_first = first + len(inserted.newlines)
+        self.pending_delta += len(inserted_text) - removed_length
+
+    def _find(self, offset):
+        # index of the first newline at or behind offset
+        newlines = self.newlines
+        first = self.pending_first
+
+        if first == len(newlines) or newlines[first] + self.pending_delta >= offset:
+            return bisect_left(newlines, offset, 0, first)
+        else:
+            return bisect_left(newlines, offset - self.pending_delta, first)
+
+    def _get_newline(self, i):
+        return self.newlines[i] + self.pending_delta if i >= self.pending_first else self.newlines[i]
+
+    def _apply_pending(self, i):
+        # applies the pending delta to the newlines between pending_first and i, so that it is
+        # pending for newlines[i:]
+        newlines = self.newlines
+        first = self.pending_first
+        delta = self.pending_delta
+
+        if i > first:
+            newlines[first:i] = array('q', [newline + delta for newline in newlines[first:i]])
+        elif i < first:
+            newlines[i:first] = array('q', [newline - delta for newline in newlines[i:first]])
+
+        self.pending_first = i
+
+
+class LineShift:
+    # Line delta of a run of consecutive tokens, used as their Token.line_index. The tokens keep
+    # their lines without the delta, so an edit that adds or removes lines changes the deltas of
+    # the runs behind it instead of the positions of their tokens.
+    __slots__ = ('line_delta', )
+
+    def __init__(self):
+        self.line_delta = 0
+
+    def line_pos(self, pos):
+        return pos[0] + self.line_delta, pos[1]
+
+
+def set_line_shift(token, line_shift):
+    line, column = token.pos
+    token.line_index = line_shift
+    token._pos = (line - line_shift.line_delta, column)
+
+
+def set_shifted_pos(token, pos):
+    # sets the position of a token of a run
+    token._pos = (pos[0] - token.line_index.line_delta, pos[1])
+
+
+class ParseResult:
+
+    def __init__(self, source_string, token_list, nodes, line_index=None, line_shifts=None):
+        self.source_string = source_string
+        self.token_list = token_list
+        self.nodes = nodes
+        self.parents = {}
+        self.line_index = SourceLineIndex(source_string) if line_index is None else line_index
+
+        if line_shifts is None:
+            line_shifts = []
+
+            for i in range(0, len(token_list), LINE_SHIFT_TOKENS):
+                line_shift = LineShift()
+                line_shifts.append(line_shift)
+
+                for token in token_list[i:i + LINE_SHIFT_TOKENS]:
+                    set_line_shift(token, line_shift)
+
+        # line shifts of the runs of token_list in order
+        self.line_shifts = line_shifts
+
+        for node in iter_nodes(self.get_program_node()):
+            self._set_parent(node)
+
+    def get_program_node(self):
+        return self.nodes[1]
+
+    def get_parent(self, node):
+        return self.parents.get(id(node))
+
+    def _set_parent(self, node):
+        if type(node) is GrammarNode:
+            for child in node.content:
+                self.parents[id(child)] = node
+
+    def replace_node(self, old_node, new_node):
+        parent = self.get_parent(old_node)
+        parent.content[[id(child) for child in parent.content].index(id(old_node))] = new_node
+
+        for node in iter_nodes(old_node):
+            self.parents.pop(id(node), None)
+
+        self.parents[id(new_node)] = parent
+
+        for node in iter_nodes(new_node):
+            self._set_parent(node)
+
+
+class IncrementalParser:
+    """
+    Lexes and parses a source once and then updates the result after text edits. An edit re-lexes
+    only the tokens around the edited text and re-parses only the smallest operator (OPERATOR or
+    COMPLEX_OPERATOR) containing the changed tokens, the rest of the tree is kept. When no such
+    operator exists, or the operator is not valid on its own any more, the whole token list is
+    parsed again.
+
+    Tokens keep their lines relative to their run (see LineShift) and the result keeps a line index
+    of the source, so an edit that adds or removes lines does not rewrite the positions of all the
+    tokens behind it.
+
+    The lexical parser must use the regex scanner with eager positions.
+    """
+
+    def __init__(self, lexical_parser, syntax_analyzer=None):
+        if not lexical_parser.regex_scanner or lexical_parser.line_index is not None:
+            raise ValueError("incremental parsing needs the regex scanner with eager positions")
+
+        self.lexical_parser = lexical_parser
+        self.syntax_analyzer = SyntaxAnalyzer() if syntax_analyzer is None else syntax_analyzer
+        self.constants = SymbolTable(['true', 'false'])
+
+    def parse(self, source_string):
+        token_list = list(self.lexical_parser.scan(source_string))
+        return ParseResult(source_string, token_list, self._parse_tokens(token_list[:]))
+
+    def edit(self, result, offset, removed_length, inserted_text):
+        # Applies the edit to the source of result and updates result. Tokens and nodes that are
+        # not affected by the edit are reused.
+        source_string = result.source_string
+        new_source_string = source_string[:offset] + inserted_text + source_string[offset + removed_length:]
+        token_list = result.token_list
+
+        if len(token_list) == 0:
+            return self.parse(new_source_string)
+
+        edit_end = offset + removed_length
+        line_index = result.line_index
+        start_pos = line_index.line_pos(offset)
+        end_pos = line_index.line_pos(edit_end)
+
+        # the tokens touching the edit and one more on each side can change, re-lexing starts at
+        # the beginning of the line of the first of them
+        first = max(bisect_left(token_list, start_pos, key=lambda token: token.pos) - 1, 0)
+        lex_start_pos = (token_list[first].pos[0], 1)
+        first = bisect_left(token_list, lex_start_pos, key=lambda token: token.pos)
+        lex_start = line_index.get_offset(lex_start_pos)
+        last = bisect_left(token_list, end_pos, key=self._get_start_pos) + 2
+
+        line_delta = inserted_text.count('\n') - (end_pos[0] - start_pos[0])
+        if '\n' in inserted_text:
+            inserted_end_column = len(inserted_text) - inserted_text.rfind('\n')
+        else:
+            inserted_end_column = start_pos[1] + len(inserted_text)
+
+        def shift_pos(pos):
+            # position after the edit of a position behind the edited text
+            line, column = pos
+            if line == end_pos[0]:
+                column += inserted_end_column - end_pos[1]
+            return line + line_delta, column
+
+        new_tokens = None
+        if last < len(token_list):
+            lex_end = line_index.get_offset(token_list[last - 1].pos)
+            new_lex_end = lex_end + len(new_source_string) - len(source_string)
+            new_tokens = self._scan(new_source_string, lex_start, new_lex_end, lex_start_pos)
+
+            # the last token has to come out unchanged, otherwise the edit affects more tokens
+            old_token = token_list[last - 1]
+            if len(new_tokens) == 0 or new_tokens[-1].value != old_token.value or \
+                    new_tokens[-1].pos != shift_pos(old_token.pos):
+                new_tokens = None
+
+        if new_tokens is None:
+            last = len(token_list)
+            new_tokens = self._scan(new_source_string, lex_start, len(new_source_string), lex_start_pos)
+
+        # keep the unchanged tokens at both ends of the re-lexed range, they are part of the tree
+        old_first, old_last, new_first, new_last = first, last, 0, len(new_tokens)
+        while old_first < old_last and new_first < new_last and \
+                self._is_same_token(token_list[old_first], new_tokens[new_first], token_list[old_first].pos):
+            old_first += 1
+            new_first += 1
+        while old_first < old_last and new_first < new_last and \
+                self._is_same_token(token_list[old_last - 1], new_tokens[new_last - 1],
+                                    shift_pos(token_list[old_last - 1].pos)):
+            old_last -= 1
+            new_last -= 1
+
+        new_tokens[:new_first] = token_list[first:old_first]
+        new_tokens[len(new_tokens) - (last - old_last):] = token_list[old_last:last]
+        new_first, new_last = old_first, old_first + new_last - new_first
+        shift_first = old_last
+
+        if old_first == old_last and new_first == new_last:
+            # only whitespace changed
+            self._shift_tokens(result, shift_first, end_pos[0], line_delta, shift_pos)
+            result.source_string = new_source_string
+            line_index.edit(offset, removed_length, inserted_text)
+            return result
+
+        if old_first == old_last:
+            # nothing removed: the inserted tokens belong to the operator of a neighbour
+            if old_first > 0:
+                old_first -= 1
+                new_first -= 1
+            elif old_last < len(token_list):
+                old_last += 1
+                new_last += 1
+
+        node = self._find_operator(result, token_list, old_first, old_last)
+        if node is not None:
+            node_first = bisect_left(token_list, get_first_leaf(node).pos, key=lambda token: token.pos)
+            node_last = bisect_left(token_list, get_last_leaf(node).pos, key=lambda token: token.pos) + 1
+
+        self._shift_tokens(result, shift_first, end_pos[0], line_delta, shift_pos)
+        token_list[first:last] = new_tokens
+        self._add_to_runs(result, first, first + len(new_tokens))
+        result.source_string = new_source_string
+        line_index.edit(offset, removed_length, inserted_text)
+
+        if node is not None:
+            node_last += (new_last - new_first) - (old_last - old_first)
+            new_node = self._parse_operator(token_list[node_first:node_last])
+
+            if new_node is not None:
+                result.replace_node(node, new_node)
+                return result
+
+        return ParseResult(new_source_string, token_list, self._parse_tokens(token_list[:]), line_index,
+                           result.line_shifts)
+
+    def _parse_tokens(self, token_list, goal=None):
+        lexical_parser = self.lexical_parser
+        self.constants.extend(lexical_parser.constants[len(self.constants) - 2:])
+
+        return self.syntax_analyzer.parse(
+            token_list,
+            self.constants,
+            lexical_parser.keywords,
+            lexical_parser.identifiers,
+            lexical_parser.delimiters,
+            goal
+        )
+
+    def _parse_operator(self, token_list):
+        try:
+            nodes = self._parse_tokens(token_list, OPERATOR_NON_TERMINAL)
+        except ParseError:
+            return None
+
+        if len(nodes) == 2 and type(nodes[1]) is GrammarNode:
+            return nodes[1]
+        else:
+            return None
+
+    def _find_operator(self, result, token_list, first, last):
+        # smallest operator node containing the tokens token_list[first:last]
+        last_pos = token_list[last - 1].pos
+        child = token_list[first]
+        node = result.get_parent(child)
+
+        while node is not None:
+            parent = result.get_parent(node)
+
+            if parent is not None and get_last_leaf(node).pos >= last_pos and not is_operator_list(node) and \
+                    is_operator_position(parent, parent.content.index(node)) and is_operator_start(node):
+                return node
+
+            node = parent
+
+        return None
+
+    @staticmethod
+    def _shift_tokens(result, first, end_line, line_delta, shift_pos):
+        # moves the tokens behind the edit. The ones on its last line are moved one by one, and
+        # when lines were added or removed, the rest of the run of the first of them too and the
+        # runs behind it by their line delta
+        token_list = result.token_list
+        if first == len(token_list):
+            return
+
+        line_shift = token_list[first].line_index
+        moved = []
+        run_tail = []
+
+        for i in range(first, len(token_list)):
+            token = token_list[i]
+            pos = token.pos
+
+            if token.line_index is line_shift and line_delta != 0:
+                run_tail.append(token)
+            elif pos[0] != end_line:
+                break
+
+            moved.append((token, shift_pos(pos)))
+
+        line_shifts = result.line_shifts
+        run = line_shifts.index(line_shift)
+
+        if line_delta != 0:
+            for i in range(run + 1, len(line_shifts)):
+                line_shifts[i].line_delta += line_delta
+
+        for token, pos in moved:
+            set_shifted_pos(token, pos)
+
+        # a run that has grown by inserted tokens is split, so that few tokens are moved one by one
+        if len(run_tail) > LINE_SHIFT_TOKENS:
+            new_line_shift = LineShift()
+            new_line_shift.line_delta = line_shift.line_delta
+            line_shifts.insert(run + 1, new_line_shift)
+
+            for token in run_tail[len(run_tail) // 2:]:
+                set_line_shift(token, new_line_shift)
+
+    @staticmethod
+    def _add_to_runs(result, first, last):
+        # the re-lexed tokens token_list[first:last] join the run of the token before them
+        token_list = result.token_list
+
+        if first == 0 and last > 0 and token_list[0].line_index is None:
+            line_shift = next((token.line_index for token in token_list if token.line_index is not None), None)
+            if line_shift is None:
+                line_shift = LineShift()
+                result.line_shifts.insert(0, line_shift)
+
+            set_line_shift(token_list[0], line_shift)
+
+        for i in range(max(first, 1), last):
+            token = token_list[i]
+            if token.line_index is None:
+                set_line_shift(token, token_list[i - 1].line_index)
+
+    def _scan(self, source_string, start, end, start_pos):
+        line, column = start_pos
+        return list(self.lexical_parser.scan(source_string[start:end], line, column - 1, end == len(source_string)))
+
+    @staticmethod
+    def _is_same_token(old_token, new_token, pos):
+        return old_token.value == new_token.value and new_token.pos == pos
+
+    @staticmethod
+    def _get_start_pos(token):
+        line, column = token.pos
+        return line, column - len(token.value)
@@ -1,21 +1,45 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import codecs
+import os
 import re
+from array import array
+from bisect import bisect_left
+from itertools import chain
 from exceptions import InvalidIdentifierError, ParseError
 
 
 class Token:
+    __slots__ = ('table', 'index', '_pos', 'value', 'line_index', 'terminal')
+
     TYPE_CONST = 1
     TYPE_KEYWORD = 2
     TYPE_IDENTIFIER = 3
     TYPE_DELIMITER = 4
 
-    def __init__(self, table, index, pos, value):
+    def __init__(self, table, index, pos, value, line_index=None):
+        # with a line_index, pos is resolved into (line, line_pos) on demand by line_index.line_pos: it is
+        # a source offset for a LineIndex, see incremental.LineShift for lines kept relative to a run
         self.table = table
         self.index = index
-        self.pos = pos
+        self._pos = pos
         self.value = value
+        self.line_index = line_index
+        # code of the grammar terminal, set by the syntax analyzer
+        self.terminal = None
+
+    @property
+    def pos(self):
+        if self.line_index is None:
+            return self._pos
+        else:
+            return self.line_index.line_pos(self._pos)
+
+    @pos.setter
+    def pos(self, pos):
+        self._pos = pos
+        self.line_index = None
 
     def __str__(self):
         return "({}, {})".format(self.table, self.index)
@@ -28,12 +52,172 @@ class Token:
         return " ".join(map(lambda token: token.value, token_list))
 
 
+# Append-only list of symbols in insertion order. Membership tests and `index` are dict
+# lookups, so the table can be used anywhere a list of symbols is expected.
+class SymbolTable(list):
+
+    def __init__(self, symbols=()):
+        super().__init__()
+        self.indices = {}
+        self.extend(symbols)
+
+    def add(self, symbol):
+        # appends the symbol if it is new, returns its index
+        index = self.indices.get(symbol)
+
+        if index is None:
+            index = self.indices[symbol] = len(self)
+            super().append(symbol)
+
+        return index
+
+    def append(self, symbol):
+        self.indices.setdefault(symbol, len(self))
+        super().append(symbol)
+
+    def extend(self, symbols):
+        for symbol in symbols:
+            self.append(symbol)
+
+    def index(self, symbol, *args):
+        if args:
+            return super().index(symbol, *args)
+
+        try:
+            return self.indices[symbol]
+        except (KeyError, TypeError):
+            raise ValueError("{!r} is not in list".format(symbol))
+
+    def __contains__(self, symbol):
+        try:
+            return symbol in self.indices
+        except TypeError:
+            return False
+
+    def __add__(self, other):
+        result = SymbolTable(self)
+        result.extend(other)
+        return result
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+
+# Offsets of the newlines of a source, turns a source offset into the (line, line_pos) the
+# character walker reports for a token ending there.
+class LineIndex:
+
+    def __init__(self):
+        self.newlines = array('q')
+
+    def add_newlines(self, text, offset=0):
+        # text starts at the given source offset
+        i = text.find('\n')
+
+        while i >= 0:
+            self.newlines.append(offset + i)
+            i = text.find('\n', i + 1)
+
+    def line_pos(self, offset):
+        line = bisect_left(self.newlines, offset)
+        line_start = self.newlines[line - 1] + 1 if line > 0 else 0
+        return line + 1, offset - line_start + 1
+
+
+# Struct-of-arrays token storage: table, index, line and column are kept in array('i') columns
+# and values are interned, Token objects are created on access. Supports the list operations
+# the parser and the translator use (len, indexing, slicing, iteration, append and pop).
+# With a line_index only source offsets are stored, see Token.
+class TokenBuffer:
+
+    def __init__(self, tokens=(), values=None, line_index=None):
+        self.tables = array('i')
+        self.indices = array('i')
+        self.lines = array('i')
+        self.columns = array('i')
+        self.offsets = array('q')
+        self.value_ids = array('i')
+        self.values = SymbolTable() if values is None else values
+        self.line_index = line_index
+
+        self.extend(tokens)
+
+    def append(self, token):
+        self.tables.append(token.table)
+        self.indices.append(token.index)
+
+        if self.line_index is None:
+            line, column = token.pos
+            self.lines.append(line)
+            self.columns.append(column)
+        else:
+            self.offsets.append(token._pos)
+
+        self.value_ids.append(self.values.add(token.value))
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def pop(self, i=-1):
+        token = self[i]
+
+        for column in self._columns():
+            column.pop(i)
+
+        return token
+
+    def _columns(self):
+        if self.line_index is None:
+            return self.tables, self.indices, self.lines, self.columns, self.value_ids
+        else:
+            return self.tables, self.indices, self.offsets, self.value_ids
+
+    def _token(self, table, index, pos, value_id):
+        return Token(table, index, pos, self.values[value_id], self.line_index)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            result = TokenBuffer(values=self.values, line_index=self.line_index)
+
+            for name, column in zip(('tables', 'indices', 'lines', 'columns', 'offsets', 'value_ids'),
+                                    (self.tables, self.indices, self.lines, self.columns, self.offsets,
+                                     self.value_ids)):
+                setattr(result, name, column[i])
+
+            return result
+
+        if self.line_index is None:
+            return self._token(self.tables[i], self.indices[i], (self.lines[i], self.columns[i]), self.value_ids[i])
+        else:
+            return self._token(self.tables[i], self.indices[i], self.offsets[i], self.value_ids[i])
+
+    def __iter__(self):
+        if self.line_index is None:
+            for table, index, line, column, value_id in zip(*self._columns()):
+                yield self._token(table, index, (line, column), value_id)
+        else:
+            for table, index, offset, value_id in zip(*self._columns()):
+                yield self._token(table, index, offset, value_id)
+
+    def __repr__(self):
+        return "<TokenBuffer {}>".format(", ".join(map(str, self)))
+
+
 class LexicalParser:
-    def __init__(self, keywords, identifier_regex=r'[A-Za-z_][A-Za-z0-9_]*'):
-        self.constants = []
-        self.identifiers = []
-        self.keywords = keywords
-        self.delimiters = []
+    # skipped whitespace, then: two-char operators | numbers with fractional part | words | single-char delimiters
+    SCANNER_REGEX = re.compile(r'(\s*)(==|<=|>=|!=|\d+\.\d\w*|\w+|\S)')
+
+    def __init__(self, keywords, identifier_regex=r'[A-Za-z_][A-Za-z0-9_]*', regex_scanner=False,
+                 compact_tokens=False, lazy_positions=False):
+        self.constants = SymbolTable()
+        self.identifiers = SymbolTable()
+        self.keywords = SymbolTable(keywords)
+        self.delimiters = SymbolTable()
 
         self.identifierRegex = re.compile(identifier_regex)
 
@@ -43,13 +227,27 @@ class LexicalParser:
         self.line_pos = 1
         self.line = 1
 
+        # regex scanner only: tokens keep source offsets, lines are looked up in line_index on demand
+        self.line_index = LineIndex() if lazy_positions else None
+
         self.source_string = ""
-        self.token_list = []
+        # a TokenBuffer takes less memory than a list, but lexing into it is slower (about 1.3 times
+        # on 600 KB), as every token is still created and then split into the columns
+        self.token_list = TokenBuffer(line_index=self.line_index) if compact_tokens else []
+
+        self.regex_scanner = regex_scanner
+        self.known_words = {}
 
     def parse(self, source_string):
         self.source_string = source_string
         self.length = len(source_string)
 
+        if self.regex_scanner or self.line_index is not None:
+            for tokens in self._scan_tokens((source_string, )):
+                self.token_list.extend(tokens)
+
+            return self.token_list
+
         while True:
             self._parse_whitespaces()
 
@@ -57,27 +255,230 @@ class LexicalParser:
                 break
 
             token_word = self._parse_token_word()
-            token_type = self._get_type(token_word)
+            self.token_list.append(self._get_token(token_word))
 
-            if token_type == Token.TYPE_CONST:
-                self.token_list.append(self._get_const_token(token_word))
+            if not self._has_next():
+                break
 
-            elif token_type == Token.TYPE_KEYWORD:
-                self.token_list.append(self._get_keyword_token(token_word))
+        return self.token_list
 
-            elif token_type == Token.TYPE_IDENTIFIER:
-                self.token_list.append(self._get_identifier_token(token_word))
+    def _get_token(self, token_word):
+        token_type = self._get_type(token_word)
 
-            elif token_type == Token.TYPE_DELIMITER:
-                self.token_list.append(self._get_delimiter_token(token_word))
+        if token_type == Token.TYPE_CONST:
+            return self._get_const_token(token_word)
 
-            else:
-                raise ParseError(self.line, self.line_pos, "not a valid token for token word '{}'".format(token_word))
+        elif token_type == Token.TYPE_KEYWORD:
+            return self._get_keyword_token(token_word)
 
-            if not self._has_next():
+        elif token_type == Token.TYPE_IDENTIFIER:
+            return self._get_identifier_token(token_word)
+
+        elif token_type == Token.TYPE_DELIMITER:
+            return self._get_delimiter_token(token_word)
+
+        else:
+            raise ParseError(self.line, self.line_pos, "not a valid token for token word '{}'".format(token_word))
+
+    def iter_tokens(self, source, chunk_size=1 << 16):
+        # Lazily yields the tokens of a file object (text or binary, e.g. an open file or an mmap)
+        # or of a file path. The source is read in chunks and the tokens are not collected into
+        # `token_list`, so memory use does not grow with the size of the source.
+        if isinstance(source, (str, bytes, os.PathLike)):
+            with open(source, 'rb') as f:
+                yield from self.iter_tokens(f, chunk_size)
+        else:
+            yield from chain.from_iterable(self._scan_tokens(self._read_chunks(source, chunk_size)))
+
+    @staticmethod
+    def _read_chunks(f, chunk_size):
+        decoder = None
+
+        while True:
+            chunk = f.read(chunk_size)
+
+            if not chunk:
                 break
 
-        return self.token_list
+            if isinstance(chunk, (bytes, bytearray)):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = decoder.decode(chunk)
+
+            yield chunk
+
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+
+    def scan(self, text, line=1, line_offset=0, at_end=True):
+        # Yields the tokens of a piece of source that starts at the given line after line_offset
+        # characters of it; at_end tells whether the source ends with this piece.
+        if self.line_index is not None:
+            raise ValueError("scanning a piece of source needs eager positions")
+
+        return chain.from_iterable(self._scan_tokens((text, ), line, line_offset, at_end))
+
+    def _scan_tokens(self, chunks, line=1, line_offset=0, at_end=True):
+        # Yields the tokens in lists, one for each list of words of the scanner: the loop over the
+        # tokens is the hot path of lexing, a generator step for every token costs more than the
+        # lookup of the word and the creation of the token.
+        line_index = self.line_index
+
+        if line_index is None:
+            batches = self._scan_words(chunks, line, line_offset, at_end)
+        else:
+            batches = self._scan_offsets(chunks)
+
+        # a word always maps to the same table and index, so it is classified once
+        known_words = self.known_words
+
+        for words in batches:
+            tokens = []
+
+            for token_word, pos in words:
+                known = known_words.get(token_word)
+
+                if known is None:
+                    # the tokens before a new word are handed out first, its classification may fail
+                    if len(tokens) > 0:
+                        yield tokens
+                        tokens = []
+
+                    self.line, self.line_pos = pos if line_index is None else line_index.line_pos(pos)
+                    token = self._get_token(token_word)
+                    known = known_words[token_word] = (token.table, token.index)
+
+                tokens.append(Token(known[0], known[1], pos, token_word, line_index))
+
+            yield tokens
+
+    def _scan_words(self, chunks, line=1, line_offset=0, at_end=True):
+        # Yields lists of (token_word, (line, line_pos)) exactly as the character walker reports
+        # them. Tokens never span lines, so the text is matched line by line with SCANNER_REGEX,
+        # the position of a word follows from the lengths of the words and the whitespace before
+        # it. Of the unfinished last line of a chunk only the words that cannot grow any more are
+        # matched, the rest of it is carried over to the next chunk.
+        findall = self.SCANNER_REGEX.findall
+        finditer = self.SCANNER_REGEX.finditer
+        # line_offset is the number of characters of the current line already scanned
+        rest = ""
+
+        for chunk in chunks:
+            lines = (rest + chunk).split('\n')
+            rest = lines.pop()
+
+            for text in lines:
+                # whitespace at the end of a line is not matched
+                line_pos = line_offset + 1
+                words = []
+
+                for space, token_word in findall(text):
+                    line_pos += len(space) + len(token_word)
+                    words.append((token_word, (line, line_pos)))
+
+                yield words
+                line += 1
+                line_offset = 0
+
+            length = len(rest)
+            stop = len(rest.rstrip())
+            # a word followed by whitespace is complete, otherwise two characters of lookahead
+            # are needed ('12' may become '12.5', '<' may become '<=')
+            limit = stop if stop < length else length - 2
+            scanned = 0
+            words = []
+
+            for match in finditer(rest, 0, stop):
+                end = match.end()
+
+                if end > limit:
+                    break
+
+                words.append((match.group(2), (line, line_offset + end + 1)))
+                scanned = end
+
+            yield words
+
+            if scanned > 0:
+                rest = rest[scanned:]
+                line_offset += scanned
+
+        length = len(rest)
+
+        words = []
+
+        if not at_end:
+            # more source follows: the last line is scanned like the others
+            for match in finditer(rest, 0, len(rest.rstrip())):
+                words.append((match.group(2), (line, line_offset + match.end() + 1)))
+
+            yield words
+            return
+
+        for match in finditer(rest, 0, len(rest.rstrip())):
+            end = match.end()
+
+            if end == length:
+                # the walker does not step past the last character of the source
+                words.append((match.group(2), (line, line_offset + end)))
+                break
+
+            words.append((match.group(2), (line, line_offset + end + 1)))
+
+            # same as `_has_next` in `parse`: a single character left after a token is not scanned
+            if end + 1 == length:
+                break
+
+        yield words
+
+    def _scan_offsets(self, chunks):
+        # Same as `_scan_words`, but yields lists of (token_word, offset) such that
+        # line_index.line_pos(offset) is the position of the token. Lines are not tracked while
+        # scanning, newlines are only recorded in line_index.
+        findall = self.SCANNER_REGEX.findall
+        finditer = self.SCANNER_REGEX.finditer
+        line_index = self.line_index
+        offset = 0  # source offset of rest[0]
+        rest = ""
+
+        for chunk in chunks:
+            line_index.add_newlines(chunk, offset + len(rest))
+            text = rest + chunk
+            length = len(text)
+            stop = len(text.rstrip())
+            limit = stop if stop < length else length - 2
+            scanned = 0
+            words = []
+
+            for space, token_word in findall(text, 0, stop):
+                end = scanned + len(space) + len(token_word)
+
+                if end > limit:
+                    break
+
+                words.append((token_word, offset + end))
+                scanned = end
+
+            yield words
+            rest = text[scanned:]
+            offset += scanned
+
+        length = len(rest)
+        words = []
+
+        for match in finditer(rest, 0, len(rest.rstrip())):
+            end = match.end()
+
+            if end == length:
+                words.append((match.group(2), offset + end - 1))
+                break
+
+            words.append((match.group(2), offset + end))
+
+            if end + 1 == length:
+                break
+
+        yield words
 
     def _get_type(self, token_word):
         if token_word in self.keywords:
@@ -154,28 +555,19 @@ class LexicalParser:
     def _get_identifier_token(self, word):
         table = Token.TYPE_IDENTIFIER
 
-        if word not in self.identifiers:
-            self.identifiers.append(word)
-
-        index = self.identifiers.index(word)
+        index = self.identifiers.add(word)
         return Token(table, index, self._current_pos(), word)
 
     def _get_const_token(self, word):
         table = Token.TYPE_CONST
 
-        if word not in self.constants:
-            self.constants.append(word)
-
-        index = self.constants.index(word)
+        index = self.constants.add(word)
         return Token(table, index, self._current_pos(), word)
 
     def _get_delimiter_token(self, word):
         table = Token.TYPE_DELIMITER
 
-        if word not in self.delimiters:
-            self.delimiters.append(word)
-
-        index = self.delimiters.index(word)
+        index = self.delimiters.add(word)
         return Token(table, index, self._current_pos(), word)
 
     def _parse_while(self, predicate):
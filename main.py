@@ -2,53 +2,156 @@
 # -*- coding: utf-8 -*-
 
 from sys import stderr
-from exceptions import InvalidIdentifierError, UndefinedIdentifierError, ParseError
-from syntaxanalyzer import SyntaxAnalyzer, GrammarNode
-from lexicalanalyzer import LexicalParser, Token
-from semanticanalyzer import SemanticAnalyzer
+from exceptions import UndefinedIdentifierError, TypeMismatchError, ParseError, SyntaxPrecedenceError, \
+    SyntaxRuleError
+from frontend import FrontEnd
+from lexicalanalyzer import Token
+from semanticanalyzer import SemanticChecker, TypeChecker
 from asmtranslator import AsmTranslator
+from asmoptimizer import AsmOptimizer
+from constantfolder import ConstantFolder
 import sys
 
 filename = "main.zl"
 
+KEYWORDS = [
+    "program",
+    "var",
+    "begin",
+    "end",
+    "integer",
+    "real",
+    "boolean",
+    "let",
+    "switch",
+    "case",
+    "for",
+    "to",
+    "do",
+    "while",
+    "loop",
+    "readln",
+    "writeln",
+    "true",
+    "false"
+]
+
+IDENTIFIER_REGEX = r'[A-Za-z][0-9]*[A-Za-z]'
+
+
+class CompileResult:
+
+    def __init__(self, source):
+        self.source = source
+        self.lexical_parser = None
+        self.token_list = None
+        self.program_node = None
+        # syntax tree built from program_node
+        self.tree = None
+        # semanticanalyzer.Scope with the declared identifiers
+        self.scope = None
+        self.semantic_error = None
+        self.asm = None
+        # instructions removed from asm by the optimizers
+        self.removed_instructions = 0
+        # ParseError that stopped the compilation
+        self.error = None
+
 
 class Compiler:
-    def __init__(self):
-        pass
+    # Keeps the syntax analyzer, and with it the grammar tables, between compilations. Every
+    # compilation gets its own lexical parser, as its symbol tables belong to one source.
+
+    def __init__(self, keywords=KEYWORDS, identifier_regex=IDENTIFIER_REGEX, optimize=True, **lexer_options):
+        self.keywords = keywords
+        self.identifier_regex = identifier_regex
+        self.optimizer = AsmOptimizer() if optimize else None
+        self.lexer_options = {'regex_scanner': True} if len(lexer_options) == 0 else lexer_options
+        self.front_end = FrontEnd(keywords, identifier_regex, **self.lexer_options)
+        self.syntax_analyzer = self.front_end.syntax_analyzer
+
+    def compile(self, source, keep_tokens=True):
+        # keep_tokens: collect the tokens into result.token_list while they are parsed
+        result = CompileResult(source)
+        lexical_parser = self.front_end.create_lexical_parser()
+        result.lexical_parser = lexical_parser
+        token_list = [] if keep_tokens else None
+
+        try:
+            try:
+                program = self.front_end.parse(source, lexical_parser, token_list)
+            except (SyntaxPrecedenceError, SyntaxRuleError):
+                # the whole source has been lexed
+                result.token_list = token_list
+                raise
 
+            result.token_list = token_list
+            result.program_node = program.program_node
+            result.tree = program.tree
+
+            try:
+                result.scope = self.check_semantic(result.tree, program.scope)
+            except (UndefinedIdentifierError, TypeMismatchError) as e:
+                result.semantic_error = e
+
+            # constants are folded and the code is specialized by type only for a program with
+            # correct types
+            constants = lexical_parser.constants
+            if self.optimizer is not None and result.semantic_error is None:
+                folder = ConstantFolder(lexical_parser)
+                folder.fold(result.tree)
+                constants = folder.constants
+
+            result.asm = self.translate(result.tree, constants, lexical_parser.identifiers,
+                                        None if result.semantic_error else result.scope)
+
+            if self.optimizer is not None:
+                result.asm = self.optimize(result.asm)
+                result.removed_instructions = self.optimizer.removed
+
+        except ParseError as e:
+            result.error = e
+
+        return result
+
+    @staticmethod
+    def check_semantic(tree, scope=None):
+        # returns the scope with the declared identifiers, the expressions of the tree get their
+        # types
+        scope = SemanticChecker(scope).check(tree)
+        TypeChecker(scope).check(tree)
+        return scope
+
+    @staticmethod
+    def translate(tree, constants, identifiers, scope=None):
+        asmt = AsmTranslator(constants, identifiers, scope)
+        asm_lines = "\n".join(asmt.tree_to_asm(tree))
+
+        asm_lines += "\nHLT\n"
+        return asm_lines
+
+    def optimize(self, asm):
+        return "\n".join(self.optimizer.optimize(asm.split("\n"))) + "\n"
+
+
+def format_error(e):
+    # InvalidIdentifierError is a ParseError too, so lexical errors are reported as syntax errors
+    return "Syntax error at {}:{} : ".format(*e.get_line_pos())
 
-if __name__ == '__main__':
-    lexicalAnalyzer = LexicalParser([
-        "program",
-        "var",
-        "begin",
-        "end",
-        "integer",
-        "real",
-        "boolean",
-        "let",
-        "switch",
-        "case",
-        "for",
-        "to",
-        "do",
-        "while",
-        "loop",
-        "readln",
-        "writeln",
-        "true",
-        "false"
-    ], r'[A-Za-z][0-9]*[A-Za-z]')
 
+if __name__ == '__main__':
     if len(sys.argv) > 1:
         filename = sys.argv[1]
 
     with open(filename) as f:
         program = f.read()
 
-    try:
-        token_list = lexicalAnalyzer.parse(program)
+    compiler = Compiler()
+    result = compiler.compile(program)
+    lexicalAnalyzer = result.lexical_parser
+    token_list = result.token_list
 
+    if token_list is not None:
         print("1. Constants:", lexicalAnalyzer.constants)
         print("2. Keywords:", lexicalAnalyzer.keywords)
         print("3. Identifiers:", lexicalAnalyzer.identifiers)
@@ -58,107 +161,20 @@ if __name__ == '__main__':
 
         print(", ".join(map(str, token_list)))
 
-        s = SyntaxAnalyzer()
-        nodes = s.parse(
-            token_list[:],
-            lexicalAnalyzer.constants + ['true', 'false'],
-            lexicalAnalyzer.keywords,
-            lexicalAnalyzer.identifiers,
-            lexicalAnalyzer.delimiters
-        )
-        program_node = nodes[1]
-        print(program_node.to_format_str())
-
-        def get_node_children(node):
-            if type(node) is GrammarNode:
-                children = []
-
-                for child in node.content:
-                    if type(child) is GrammarNode:
-                        children.append(child)
-
-                return children
-            else:
-                return None
-
-        IDENTIFIERS = lexicalAnalyzer.identifiers
-
-        TYPES = ['integer', 'real', 'boolean']
+    if result.program_node is not None:
+        result.program_node.write_format(sys.stdout)
+        print()
 
-        def IS_IDENTIFIER_DEF_NODE(node):
-            try:
-                return type(node) is GrammarNode and node.content[-2].value == ':' and node.content[-1].content[0].value in TYPES
-            except (NameError, IndexError, AttributeError):
-                return False
-
-        def get_identifiers_def(node):
-            if type(node) is GrammarNode:
-                try:
-                    if IS_IDENTIFIER_DEF_NODE(node):
-                        identifiers_defined = []
-                        # search Identifiers
-
-                        node_queue = [node.content[0]]
-                        while len(node_queue) > 0:
-                            current_node = node_queue.pop(0)
-
-                            for node in current_node.content:
-                                if type(node) is GrammarNode:
-                                    node_queue.append(node)
-                                elif node.value in IDENTIFIERS:
-                                    identifiers_defined.append(node.value)
-
-                        return identifiers_defined
-
-                except (NameError, IndexError):
-                    return None
-            return None
-
-        def get_identifiers_used(node):
-            if type(node) is GrammarNode:
-                identifiers_used = []
-
-                for i in node.content:
-                    if i.value in IDENTIFIERS:
-                        identifiers_used.append(i.value)
-
-                if len(identifiers_used) > 0:
-                    return identifiers_used
-                else:
-                    return None
-
-            return None
-
-        semantic = SemanticAnalyzer(
-            get_node_children,
-            get_identifiers_def,
-            get_identifiers_used
-        )
-
-        try:
-            semantic.parse_tree(program_node)
-        except UndefinedIdentifierError as e:
-            print("Semantic error: {}".format(e))
+        if result.semantic_error is not None:
+            print("Semantic error: {}".format(result.semantic_error))
         else:
             print("Semantic analyze finished: OK")
 
-        begin = 0
-        end = 0
-        for i, token in enumerate(token_list):
-            if token.value == "begin":
-                begin = i
-            elif token.value == "end":
-                end = i
-        program_token_list = token_list[begin + 1 : end]
-        asmt = AsmTranslator(lexicalAnalyzer.constants, lexicalAnalyzer.identifiers)
-        asm_lines = "\n".join(asmt.to_asm(program_token_list))
-
-        asm_lines += "\nHLT\n"
+    if result.asm is not None:
         with open("main.asm", "w") as f:
-            f.write(asm_lines)
+            f.write(result.asm)
 
-    except ParseError as e:
-        print("Syntax error at {}:{} : ".format(*e.get_line_pos()))
+        print(compiler.optimizer.get_report(), file=stderr)
 
-    except InvalidIdentifierError as e:
-        print("Invalid identifier error at {}:{} : ".format(*e.get_line_pos()) + e.get_info())
+    if result.error is not None:
+        print(format_error(result.error))
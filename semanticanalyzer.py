@@ -2,22 +2,34 @@
 # -*- coding: utf-8 -*-
 
 
-from exceptions import UndefinedIdentifierError
+from collections import deque
+from exceptions import UndefinedIdentifierError, TypeMismatchError
+from syntaxtree import TreeVisitor, BinaryOp, Identifier
+
+TYPE_INTEGER = 'integer'
+TYPE_REAL = 'real'
+TYPE_BOOLEAN = 'boolean'
+
+NUMERIC_TYPES = (TYPE_INTEGER, TYPE_REAL)
+
+ARITHMETIC_OPERATORS = ('+', '-', '*', '/')
+ORDER_OPERATORS = ('<', '<=', '>', '>=')
+EQUALITY_OPERATORS = ('==', '!=')
 
 
 class SemanticAnalyzer:
 
     def __init__(self, get_node_children=lambda x: None, get_identifiers_def=lambda x: None, get_identifiers_used=lambda x: None):
-        self.defined_identifiers = []
+        self.defined_identifiers = set()
         self.get_identifiers_def = get_identifiers_def
         self.get_identifiers_used = get_identifiers_used
         self.get_node_children = get_node_children
 
     def parse_tree(self, tree):
-        nodes_queue = [tree]
+        nodes_queue = deque([tree])
 
         while len(nodes_queue) > 0:
-            current_node = nodes_queue.pop(0)
+            current_node = nodes_queue.popleft()
 
             current_id_defs = self.get_identifiers_def(current_node)
             current_id_used = self.get_identifiers_used(current_node)
@@ -28,7 +40,7 @@ class SemanticAnalyzer:
                         raise UndefinedIdentifierError(identifier, *current_node.get_line_pos())
 
             if current_id_defs is not None:
-                self.defined_identifiers += current_id_defs
+                self.defined_identifiers.update(current_id_defs)
 
             next_nodes = self.get_node_children(current_node)
 
@@ -36,3 +48,175 @@ class SemanticAnalyzer:
                 nodes_queue += next_nodes
 
         return True
+
+
+class Symbol:
+    __slots__ = ('name', 'type_name', 'pos')
+
+    def __init__(self, name, type_name, pos):
+        self.name = name
+        self.type_name = type_name
+        # position of the identifier in its declaration
+        self.pos = pos
+
+    def __repr__(self):
+        return "<Symbol {} : {} at {}>".format(self.name, self.type_name, self.pos)
+
+
+class Scope:
+    # Symbols by name. A lookup that misses in a scope goes on in its parent scope.
+
+    def __init__(self, parent=None):
+        self.symbols = {}
+        self.parent = parent
+
+    def declare(self, name, type_name, pos):
+        # an identifier declared again keeps its first declaration
+        symbol = self.symbols.get(name)
+
+        if symbol is None:
+            symbol = self.symbols[name] = Symbol(name, type_name, pos)
+
+        return symbol
+
+    def lookup(self, name):
+        scope = self
+
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+
+            scope = scope.parent
+
+        return None
+
+
+class SemanticChecker(TreeVisitor):
+    # Checks a syntax tree from syntaxtree.build_tree in one walk: the declarations come before
+    # the operators, so every identifier is looked up when it is reached
+
+    def __init__(self, scope=None):
+        self.scope = Scope() if scope is None else scope
+
+    def check(self, tree):
+        self.walk(tree)
+        return self.scope
+
+    def visit_Declaration(self, node):
+        for identifier in node.names:
+            self.scope.declare(identifier.name, node.type_name, identifier.pos)
+
+        return False
+
+    def visit_Identifier(self, node):
+        if self.scope.lookup(node.name) is None:
+            raise UndefinedIdentifierError(node.name, *node.pos)
+
+
+def get_constant_type(value):
+    if value in ('true', 'false'):
+        return TYPE_BOOLEAN
+    elif value.isdigit():
+        return TYPE_INTEGER
+    else:
+        return TYPE_REAL
+
+
+def get_operation_type(operator, left, right):
+    # type of the result of the binary operator, None when the operand types do not fit it. An
+    # integer operand of a real one is converted to real
+    numeric = left in NUMERIC_TYPES and right in NUMERIC_TYPES
+
+    if operator in ARITHMETIC_OPERATORS:
+        if numeric:
+            return TYPE_REAL if TYPE_REAL in (left, right) else TYPE_INTEGER
+    elif operator in ORDER_OPERATORS:
+        if numeric:
+            return TYPE_BOOLEAN
+    elif operator in EQUALITY_OPERATORS:
+        if numeric or left == right:
+            return TYPE_BOOLEAN
+
+    return None
+
+
+def is_assignable(target, value):
+    return target == value or target == TYPE_REAL and value == TYPE_INTEGER
+
+
+class TypeChecker(TreeVisitor):
+    # Sets the type of every expression of a syntax tree checked by SemanticChecker and checks
+    # that operands and assigned values have fitting types. Identifiers have the types of their
+    # declarations in the scope
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def check(self, tree):
+        self.walk(tree)
+
+    def infer(self, expression):
+        # the operands get their types before their operator, the expression is walked with a
+        # stack of nodes and flags telling whether the operands of a node are done
+        if expression.type_name is not None:
+            return expression.type_name
+
+        nodes_stack = [(expression, False)]
+        while len(nodes_stack) > 0:
+            node, operands_done = nodes_stack.pop()
+
+            if type(node) is BinaryOp:
+                if not operands_done:
+                    nodes_stack += [(node, True), (node.right, False), (node.left, False)]
+                    continue
+
+                operand_types = (node.left.type_name, node.right.type_name)
+                node.type_name = get_operation_type(node.op, *operand_types)
+
+                if node.type_name is None:
+                    raise TypeMismatchError(node.op, operand_types, *node.pos)
+            elif type(node) is Identifier:
+                node.type_name = self.scope.lookup(node.name).type_name
+            else:
+                node.type_name = get_constant_type(node.value)
+
+        return expression.type_name
+
+    def visit_Declaration(self, node):
+        return False
+
+    def visit_Assignment(self, node):
+        types = (self.infer(node.target), self.infer(node.value))
+
+        if not is_assignable(*types):
+            raise TypeMismatchError('=', types, *node.pos)
+
+        return False
+
+    def visit_For(self, node):
+        types = (self.infer(node.assignment.target), self.infer(node.limit))
+
+        if not is_assignable(*types):
+            raise TypeMismatchError('to', types, *node.limit.pos)
+
+    def visit_Switch(self, node):
+        expression_type = self.infer(node.expression)
+
+        for case in node.cases:
+            types = (expression_type, self.infer(case.constant))
+
+            if get_operation_type('==', *types) is None:
+                raise TypeMismatchError('case', types, *case.pos)
+
+    def visit_BinaryOp(self, node):
+        self.infer(node)
+        return False
+
+    def visit_Identifier(self, node):
+        self.infer(node)
+        return False
+
+    def visit_Constant(self, node):
+        self.infer(node)
+        return False
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from gen_tables import Grammar
+import io
+import json
+from gen_tables import Grammar, get_function_relation, RELATION_NONE, RELATION_LESS, RELATION_EQUAL, RELATION_GREATER
 from lexicalanalyzer import Token
 from exceptions import SyntaxPrecedenceError, SyntaxRuleError
 
@@ -10,11 +12,20 @@ IDENTIFIER_TERMINAL = 'ID'
 
 
 class GrammarNode(Token):
+    __slots__ = ('content', )
 
     def __init__(self, pos, value, content):
         super().__init__(0, 0, pos, value)
         self.content = content
 
+    @property
+    def pos(self):
+        # a node created without a position has the position of its first token
+        if self._pos is None:
+            return self.content[0].pos
+        else:
+            return self._pos
+
     def __str__(self):
         return "({}, {})".format(self.value, self.content)
 
@@ -22,124 +33,240 @@ class GrammarNode(Token):
         return "<GrammarNode {}>".format(str(self))
 
     def to_format_str(self, indent=0):
-        result = " " * indent + self.value + " [\n"
-
-        for token in self.content:
-            if type(token) is GrammarNode:
-                result += token.to_format_str(indent + 2)
+        output = io.StringIO()
+        self.write_format(output, indent)
+        return output.getvalue()
+
+    def write_format(self, f, indent=0):
+        # writes the tree in the format of to_format_str to the file object f. The tree is walked
+        # with a stack, so deeply nested blocks do not reach the recursion limit
+        nodes_stack = [(self, indent)]
+
+        while len(nodes_stack) > 0:
+            node, indent = nodes_stack.pop()
+
+            if node is None:
+                # end of the content of a node
+                f.write(" " * indent + "]\n")
+            elif type(node) is GrammarNode:
+                f.write(" " * indent + node.value + " [\n")
+                nodes_stack.append((None, indent))
+
+                for i in range(len(node.content) - 1, -1, -1):
+                    nodes_stack.append((node.content[i], indent + 2))
             else:
-                result += " " * (indent + 2) + token.value + '\n'
-
-        result += " " * indent + "]\n"
-        return result
+                f.write(" " * indent + node.value + "\n")
 
     def get_line_pos(self):
         return self.pos
 
+
+# Parse tree serialization in JSON lines: a header line, then one line per node or token in
+# pre-order:
+#   ["N", value, number of children]          a node without a position of its own
+#   ["N", value, number of children, line, pos]
+#   ["T", table, index, line, pos, value, terminal code]
+TREE_FORMAT = 'zlang-parse-tree'
+TREE_FORMAT_VERSION = 1
+
+
+def dump_tree(node, f):
+    f.write(json.dumps({'format': TREE_FORMAT, 'version': TREE_FORMAT_VERSION}) + '\n')
+    nodes_stack = [node]
+
+    while len(nodes_stack) > 0:
+        node = nodes_stack.pop()
+
+        if type(node) is GrammarNode:
+            if node._pos is None:
+                item = ['N', node.value, len(node.content)]
+            else:
+                item = ['N', node.value, len(node.content), *node._pos]
+
+            nodes_stack += reversed(node.content)
+        else:
+            item = ['T', node.table, node.index, *node.pos, node.value, node.terminal]
+
+        f.write(json.dumps(item, separators=(',', ':')) + '\n')
+
+
+def load_tree(f):
+    # reads a tree written by dump_tree
+    header = json.loads(f.readline())
+    if header.get('format') != TREE_FORMAT or header.get('version') != TREE_FORMAT_VERSION:
+        raise ValueError("not a parse tree of version {}".format(TREE_FORMAT_VERSION))
+
+    root = None
+    # nodes with children still to be read, with the number of these children
+    open_nodes = []
+
+    for line in f:
+        item = json.loads(line)
+
+        if item[0] == 'N':
+            pos = tuple(item[3:5]) if len(item) > 3 else None
+            node = GrammarNode(pos, item[1], [])
+        else:
+            node = Token(item[1], item[2], (item[3], item[4]), item[5])
+            node.terminal = item[6]
+
+        if root is None:
+            root = node
+        else:
+            parent = open_nodes[-1]
+            parent[0].content.append(node)
+            parent[1] -= 1
+
+            if parent[1] == 0:
+                open_nodes.pop()
+
+        if item[0] == 'N' and item[2] > 0:
+            open_nodes.append([node, item[2]])
+
+        if len(open_nodes) == 0:
+            break
+
+    if root is None or len(open_nodes) > 0:
+        raise ValueError("parse tree is incomplete")
+
+    return root
+
 class SyntaxAnalyzer:
 
-    def __init__(self):
-        self.g = Grammar()
+    def __init__(self, precedence_functions=False):
+        # with precedence_functions the relations are taken from the precedence functions f and g
+        # instead of the relation matrix
+        self.g = Grammar.load()
         self.stack = []
+        self.precedence_functions = precedence_functions
+
+    def parse(self, token_list, constants, keywords, ids, delimiters, goal=None, on_reduce=None):
+        # token_list: any iterable of tokens, they are read one at a time as the parser needs them.
+        # goal: non-terminal the tokens are derived from, the start symbol by default.
+        # on_reduce: called with every node when it is created
+        goal = self.g.start_non_terminal if goal is None else goal
+        relations = self.g.get_relation_matrix(goal)
+        width = len(self.g.terminals) + 1
+        terminal_codes = self.g.terminal_codes
+        constant_code = terminal_codes[CONSTANT_TERMINAL]
+        identifier_code = terminal_codes[IDENTIFIER_TERMINAL]
 
-    def parse(self, token_list, constants, keywords, ids, delimiters):
         begin_token = Token(0, 0, (0, 0), self.g.begin_terminal)
-        self.stack.append(begin_token)
+        begin_token.terminal = terminal_codes[self.g.begin_terminal]
         end_token = Token(0, 0, (0, 0), self.g.end_terminal)
-        token_list.append(end_token)
+        end_token.terminal = terminal_codes[self.g.end_terminal]
+
+        # stack entries carry their terminal code, None for non-terminals, and top is the index of
+        # the topmost terminal. The token list is read through an iterator and is not changed
+        stack = self.stack = [begin_token]
+        top = 0
+        tokens = iter(token_list)
 
         def is_terminal(x):
-            return (x.value in self.g.terminals) or (x.value in constants) or (x.value in keywords) or\
-                   (x.value in ids) or (x.value in delimiters) or (x == begin_token) or (x == end_token)
-
-        def get_top_terminal(token_list=self.stack):
-            for x in reversed(token_list):
-                if is_terminal(x):
-                    return x
-
-        def get_next_token():
-            nonlocal token_list
-            return token_list[0]
-
-        def get_op_table_index(x):
-            if x in constants:
-                return self.g.terminals.index(CONSTANT_TERMINAL)
-            elif x in ids:
-                return self.g.terminals.index(IDENTIFIER_TERMINAL)
-            elif x == self.g.begin_terminal or x == self.g.end_terminal:
-                return len(self.g.terminals)
+            return x.terminal is not None
+
+        def classify(x):
+            # the token gets its terminal code once, when it is read from the input
+            if x.value in constants:
+                x.terminal = constant_code
+            elif x.value in ids:
+                x.terminal = identifier_code
+            elif x.value in terminal_codes:
+                x.terminal = terminal_codes[x.value]
+            else:
+                raise ValueError("'{}' is not a terminal".format(x.value))
+
+            return x
+
+        def read_token():
+            # the end token is never shifted, so it is not appended to the token list
+            token = next(tokens, None)
+
+            if token is not None:
+                return classify(token)
             else:
-                return self.g.terminals.index(x)
+                return end_token
 
         def get_token_for_rule(x):
             if is_terminal(x):
-                index = get_op_table_index(x.value)
-                return self.g.terminals[index]
+                return self.g.terminals[x.terminal]
             else:
                 return x.value
 
-        def get_op_table_content(row_item, col_item):
-            row = get_op_table_index(row_item.value)
-            col = get_op_table_index(col_item.value)
-            return self.g.op_table[row][col]
+        def get_relation(row_item, col_item):
+            return relations[row_item.terminal * width + col_item.terminal]
 
-        def find_rule_with_right(token_list):
-            right = list(map(get_token_for_rule, token_list))
-            for rule in self.g.skeleton_rules:
-                if rule.right == right:
-                    return rule
-            return None
+        if self.precedence_functions:
+            f, g, filled_rows, not_linearized_cells = self.g.get_precedence_functions(goal)
 
-        def shift(token_list):
-            self.stack.append(token_list.pop(0))
+            def get_relation(row_item, col_item):
+                i = row_item.terminal
+                j = col_item.terminal
 
-        def has_terminal(token_list):
-            for i in token_list:
-                if is_terminal(i):
-                    return True
-            return False
+                # the functions give a relation for any pair of terminals, empty cells are errors
+                if not filled_rows[i] >> j & 1:
+                    return RELATION_NONE
 
-        def reduce():
-            basis = []
+                if not_linearized_cells:
+                    relation = not_linearized_cells.get(i * width + j)
+                    if relation is not None:
+                        return relation
 
-            while not has_terminal(basis):
-                basis.append(self.stack.pop())
+                return get_function_relation(f[i], g[j])
 
-            aj = get_top_terminal(basis)
-            sj = get_top_terminal()
-            precedence = get_op_table_content(sj, aj)
-            while precedence == '=':
-                basis.append(self.stack.pop())
-                aj = get_top_terminal(basis)
-                sj = get_top_terminal()
-                precedence = get_op_table_content(sj, aj)
+        def find_rule_with_right(token_list):
+            return self.g.skeleton_rules_by_right.get(tuple(map(get_token_for_rule, token_list)))
 
-            stack_top = self.stack[-1]
-            if not is_terminal(stack_top):
-                basis.append(self.stack.pop())
+        def shift(token):
+            nonlocal top
+            stack.append(token)
+            top = len(stack) - 1
 
-            basis.reverse()
+        def get_previous_terminal(i):
+            # two non-terminals are never next to each other in the stack
+            return i - 1 if is_terminal(stack[i - 1]) else i - 2
+
+        def reduce():
+            nonlocal top
+            # the basis starts at the leftmost terminal of a chain of terminals related by '=',
+            # together with the non-terminal before it
+            first = top
+            previous = get_previous_terminal(first)
+            while get_relation(stack[previous], stack[first]) == RELATION_EQUAL:
+                first = previous
+                previous = get_previous_terminal(first)
+
+            if not is_terminal(stack[first - 1]):
+                first -= 1
+
+            basis = stack[first:]
 
             rule = find_rule_with_right(basis)
             if rule is not None:
-                new_token = GrammarNode(basis[0].pos, rule.left, basis)
-                self.stack.append(new_token)
+                del stack[first:]
+                top = first - 1
+                node = GrammarNode(None, rule.left, basis)
+                stack.append(node)
+
+                if on_reduce is not None:
+                    on_reduce(node)
             else:
                 raise SyntaxRuleError(*basis[0].pos)
 
+        aj = read_token()
         while True:
             # step 2: main loop
-            sj = get_top_terminal()
-            aj = get_next_token()
+            sj = stack[top]
 
-            if sj == begin_token and aj == end_token:
-                return self.stack
+            if sj is begin_token and aj is end_token:
+                return stack
 
-            precedence = get_op_table_content(sj, aj)
+            precedence = get_relation(sj, aj)
 
-            if precedence == '=' or precedence == '<':
-                shift(token_list)
-            elif precedence == '>':
+            if precedence == RELATION_EQUAL or precedence == RELATION_LESS:
+                shift(aj)
+                aj = read_token()
+            elif precedence == RELATION_GREATER:
                 reduce()
             else:
                 raise SyntaxPrecedenceError(*aj.pos)
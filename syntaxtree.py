@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Abstract syntax tree built from the skeleton parse tree. Every construct has its own node class,
+# chains of single-child nodes and delimiter tokens are dropped, and lists (operators, cases,
+# identifiers, expressions) are kept as Python lists instead of nested nodes.
+#
+# A node keeps the token that names its construct, its position is the position of that token:
+#   Program      'program'     Declaration  type keyword  Block       '{' or 'begin'
+#   Assignment   '=' or 'let'  Switch       'switch'      Case        'case'
+#   For          'for'         While        'do'          Input       'readln'
+#   Output       'writeln'     BinaryOp     operator      Identifier  identifier
+#   Constant     constant, 'true' or 'false'
+
+from array import array
+from lexicalanalyzer import Token
+from syntaxanalyzer import GrammarNode
+from exceptions import SyntaxRuleError
+
+
+class Node:
+    __slots__ = ('token', )
+
+    # slots holding child nodes in source order, at most one of them holds a list of nodes
+    fields = ()
+    list_field = None
+
+    def __init__(self, token, *children):
+        self.token = token
+
+        for name, child in zip(self.fields, children):
+            setattr(self, name, child)
+
+    @property
+    def pos(self):
+        return self.token.pos
+
+    def get_line_pos(self):
+        return self.token.pos
+
+    def iter_children(self):
+        for name in self.fields:
+            child = getattr(self, name)
+
+            if name == self.list_field:
+                yield from child
+            else:
+                yield child
+
+    def __repr__(self):
+        return "<{} {!r} {}>".format(type(self).__name__, self.token.value, list(self.iter_children()))
+
+
+class Program(Node):
+    __slots__ = ('declarations', 'body')
+    fields = ('declarations', 'body')
+    list_field = 'declarations'
+
+
+class Declaration(Node):
+    __slots__ = ('names', )
+    fields = ('names', )
+    list_field = 'names'
+
+    @property
+    def type_name(self):
+        return self.token.value
+
+
+class Block(Node):
+    __slots__ = ('statements', )
+    fields = ('statements', )
+    list_field = 'statements'
+
+
+class Assignment(Node):
+    __slots__ = ('target', 'value')
+    fields = ('target', 'value')
+
+    @property
+    def let(self):
+        return self.token.value == 'let'
+
+
+class Switch(Node):
+    __slots__ = ('expression', 'cases')
+    fields = ('expression', 'cases')
+    list_field = 'cases'
+
+
+class Case(Node):
+    __slots__ = ('constant', 'body')
+    fields = ('constant', 'body')
+
+
+class For(Node):
+    __slots__ = ('assignment', 'limit', 'body')
+    fields = ('assignment', 'limit', 'body')
+
+
+class While(Node):
+    __slots__ = ('condition', 'body')
+    fields = ('condition', 'body')
+
+
+class Input(Node):
+    __slots__ = ('targets', )
+    fields = ('targets', )
+    list_field = 'targets'
+
+
+class Output(Node):
+    __slots__ = ('expressions', )
+    fields = ('expressions', )
+    list_field = 'expressions'
+
+
+class Expression(Node):
+    __slots__ = ('type_name', )
+
+    def __init__(self, token, *children):
+        super().__init__(token, *children)
+        # set by the type checker
+        self.type_name = None
+
+
+class BinaryOp(Expression):
+    __slots__ = ('left', 'right')
+    fields = ('left', 'right')
+
+    @property
+    def op(self):
+        return self.token.value
+
+
+class Identifier(Expression):
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.token.value
+
+
+class Constant(Expression):
+    __slots__ = ()
+
+    @property
+    def value(self):
+        return self.token.value
+
+
+# kind codes of the flat encoding are indices in this tuple
+NODE_TYPES = (Program, Declaration, Block, Assignment, Switch, Case, For, While, Input, Output, BinaryOp,
+              Identifier, Constant)
+
+KIND_CODES = {node_type: kind for kind, node_type in enumerate(NODE_TYPES)}
+
+BINARY_OPERATORS = frozenset(('+', '-', '*', '/', '<', '<=', '>', '>=', '==', '!='))
+
+
+class TreeVisitor:
+    # Calls visit_<node class name>(node) once for every node of a tree, parents before their
+    # children and children in source order. Nodes without a visit method are only walked
+    # through, a visit method returning False skips the children of its node.
+
+    def walk(self, root):
+        visit_methods = {}
+        nodes_stack = [root]
+
+        while len(nodes_stack) > 0:
+            node = nodes_stack.pop()
+            node_type = type(node)
+
+            if node_type in visit_methods:
+                visit = visit_methods[node_type]
+            else:
+                visit = visit_methods[node_type] = getattr(self, 'visit_' + node_type.__name__, None)
+
+            if visit is None or visit(node) is not False:
+                children = list(node.iter_children())
+                children.reverse()
+                nodes_stack += children
+
+
+def build_leaf(token):
+    if type(token) is GrammarNode:
+        token = token.content[0]
+
+    if token.table == Token.TYPE_IDENTIFIER:
+        return Identifier(token)
+    else:
+        return Constant(token)
+
+
+def build_identifier(token):
+    if token.table != Token.TYPE_IDENTIFIER:
+        raise SyntaxRuleError(*token.pos)
+
+    return Identifier(token)
+
+
+def build_identifier_list(node):
+    # ID_N ::= ID | ID , ID_N
+    identifiers = []
+
+    while True:
+        if type(node) is not GrammarNode:
+            raise SyntaxRuleError(*node.pos)
+
+        content = node.content
+        identifiers.append(build_identifier(content[0]))
+
+        if len(content) == 1:
+            return identifiers
+
+        node = content[2]
+
+
+def build_expression(node):
+    # left operands are nested to the left, the chain is followed with a loop so that long
+    # expressions do not reach the recursion limit
+    operators = []
+
+    while True:
+        # an identifier of a list is a token without a node of its own
+        if type(node) is not GrammarNode:
+            expression = build_leaf(node)
+            break
+
+        content = node.content
+
+        if len(content) == 1:
+            expression = build_leaf(content[0])
+            break
+        elif len(content) != 3:
+            raise SyntaxRuleError(*node.pos)
+        elif content[0].value == '(' and content[2].value == ')':
+            node = content[1]
+        elif content[1].value in BINARY_OPERATORS:
+            operators.append(node)
+            node = content[0]
+        else:
+            raise SyntaxRuleError(*node.pos)
+
+    for node in reversed(operators):
+        content = node.content
+        expression = BinaryOp(content[1], expression, build_expression(content[2]))
+
+    return expression
+
+
+def build_expression_list(node):
+    # the skeleton parser reduces 'writeln xa, xb' by ID_N ::= ID , ID_N, so the operand of writeln
+    # is an expression or a list of identifiers separated by commas
+    expressions = []
+
+    while type(node) is GrammarNode and len(node.content) == 3 and node.content[1].value == ',':
+        expressions.append(build_expression(node.content[0]))
+        node = node.content[2]
+
+    expressions.append(build_expression(node))
+    return expressions
+
+
+def push_statement_list(node, nodes_stack):
+    # OPERATOR_N ::= OPERATOR | OPERATOR ; OPERATOR_N. Returns the list the statements are stored
+    # in when they are built from nodes_stack, the first operator is on top of it
+    operators = []
+
+    while type(node) is GrammarNode and len(node.content) in (2, 3) and node.content[1].value == ';':
+        operators.append(node.content[0])
+
+        if len(node.content) == 2:
+            break
+
+        node = node.content[2]
+    else:
+        operators.append(node)
+
+    statements = [None] * len(operators)
+
+    for i in range(len(operators) - 1, -1, -1):
+        nodes_stack.append((operators[i], statements, i))
+
+    return statements
+
+
+def build_statement_list(node):
+    # the statements nested in blocks, loops and cases are built from a stack instead of by
+    # recursion, so that deeply nested blocks do not reach the recursion limit. An item of the
+    # stack is an operator node with the list or the node its statement is stored in and the
+    # index or the field name there
+    nodes_stack = []
+    statements = push_statement_list(node, nodes_stack)
+
+    while len(nodes_stack) > 0:
+        node, target, key = nodes_stack.pop()
+        statement = build_statement(node, nodes_stack)
+
+        if type(target) is list:
+            target[key] = statement
+        else:
+            setattr(target, key, statement)
+
+    return statements
+
+
+def build_assignment(content):
+    if content[0].value == 'let':
+        return Assignment(content[0], build_identifier(content[1]), build_expression(content[3]))
+    else:
+        return Assignment(content[1], build_identifier(content[0]), build_expression(content[2]))
+
+
+def build_cases(node):
+    # CASE_N ::= case CASE_CONTENT | CASE_N case CASE_CONTENT, CASE_CONTENT ::= CONSTANT : OPERATOR.
+    # The body of a case is left as the operator node, see build_statement
+    cases = []
+
+    while True:
+        content = node.content if type(node) is GrammarNode else ()
+
+        if len(content) not in (2, 3) or content[-2].value != 'case' or type(content[-1]) is not GrammarNode or \
+                len(content[-1].content) != 3:
+            raise SyntaxRuleError(*node.pos)
+
+        case_content = content[-1].content
+        cases.append(Case(content[-2], build_leaf(case_content[0]), case_content[2]))
+
+        if len(content) == 2:
+            cases.reverse()
+            return cases
+
+        node = content[0]
+
+
+def build_output(node):
+    # OUTPUT_OPERATOR ::= writeln EXPRESSION | OUTPUT_OPERATOR \ EXPRESSION, every EXPRESSION may be
+    # a list of identifiers
+    expressions = []
+
+    while True:
+        if type(node) is not GrammarNode:
+            raise SyntaxRuleError(*node.pos)
+
+        content = node.content
+
+        if len(content) == 2 and content[0].value == 'writeln':
+            break
+        elif len(content) != 3 or content[1].value != '\\':
+            raise SyntaxRuleError(*node.pos)
+
+        expressions += reversed(build_expression_list(content[2]))
+        node = content[0]
+
+    expressions += reversed(build_expression_list(content[1]))
+    expressions.reverse()
+    return Output(content[0], expressions)
+
+
+def build_statement(node, nodes_stack):
+    # the nested statements are pushed to nodes_stack, see build_statement_list
+    if type(node) is not GrammarNode:
+        raise SyntaxRuleError(*node.pos)
+
+    content = node.content
+    first_value = content[0].value
+
+    if first_value == 'let' or len(content) == 3 and content[1].value == '=':
+        return build_assignment(content)
+    elif first_value == '{':
+        return Block(content[0], push_statement_list(content[1], nodes_stack))
+    elif first_value == 'switch':
+        switch = Switch(content[0], build_expression(content[1]), build_cases(content[3]))
+
+        for case in reversed(switch.cases):
+            nodes_stack.append((case.body, case, 'body'))
+
+        return switch
+    elif first_value == 'for':
+        statement = For(content[0], build_assignment(content[1].content), build_expression(content[3]), None)
+        nodes_stack.append((content[5], statement, 'body'))
+        return statement
+    elif first_value == 'do':
+        statement = While(content[0], build_expression(content[2]), None)
+        nodes_stack.append((content[4], statement, 'body'))
+        return statement
+    elif first_value == 'readln':
+        return Input(content[0], build_identifier_list(content[1]))
+    elif first_value == 'writeln' or len(content) == 3 and content[1].value == '\\':
+        return build_output(node)
+    else:
+        raise SyntaxRuleError(*node.pos)
+
+
+def build_declarations(node):
+    # TYPE_DEFINITION_N ::= TYPE_DEFINITION ; | TYPE_DEFINITION ; TYPE_DEFINITION_N,
+    # TYPE_DEFINITION ::= ID_N : TYPE
+    declarations = []
+
+    while True:
+        definition = node.content[0].content if type(node.content[0]) is GrammarNode else ()
+
+        if len(definition) != 3 or definition[1].value != ':' or type(definition[2]) is not GrammarNode:
+            raise SyntaxRuleError(*node.pos)
+
+        declarations.append(Declaration(definition[2].content[0], build_identifier_list(definition[0])))
+
+        if len(node.content) == 2:
+            return declarations
+
+        node = node.content[2]
+
+
+def build_tree(program_node):
+    # program_node: GrammarNode of the whole program, the node at index 1 of the parser stack
+    content = program_node.content
+    return Program(content[0], build_declarations(content[2]), Block(content[3], build_statement_list(content[4])))
+
+
+class FlatTree:
+    # Array-backed encoding of a tree: node i has kinds[i], the index of its first child and of
+    # its next sibling (-1 for none) and the index of its token in the token list of the program.
+    # Node 0 is the root.
+
+    def __init__(self, token_list):
+        # token_list: tokens the tree was parsed from, a TokenBuffer with the same tokens can be
+        # used to read a tree back
+        self.token_list = token_list
+        self.kinds = array('b')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.token_refs = array('i')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, root, token_list):
+        tree = cls(token_list)
+        token_indices = {id(token): i for i, token in enumerate(token_list)}
+        kinds = tree.kinds
+        first_children = tree.first_children
+        next_siblings = tree.next_siblings
+        # last numbered child of every node
+        last_children = array('i')
+
+        # nodes are numbered in pre-order, so children come after their parent
+        nodes_stack = [(root, -1)]
+        while len(nodes_stack) > 0:
+            node, parent = nodes_stack.pop()
+            i = len(kinds)
+
+            kinds.append(KIND_CODES[type(node)])
+            first_children.append(-1)
+            next_siblings.append(-1)
+            last_children.append(-1)
+            tree.token_refs.append(token_indices[id(node.token)])
+
+            if parent >= 0:
+                if last_children[parent] < 0:
+                    first_children[parent] = i
+                else:
+                    next_siblings[last_children[parent]] = i
+                last_children[parent] = i
+
+            children = list(node.iter_children())
+            for j in range(len(children) - 1, -1, -1):
+                nodes_stack.append((children[j], i))
+
+        return tree
+
+    def iter_children(self, i):
+        child = self.first_children[i]
+
+        while child >= 0:
+            yield child
+            child = self.next_siblings[child]
+
+    def get_token(self, i):
+        return self.token_list[self.token_refs[i]]
+
+    def get_node_type(self, i):
+        return NODE_TYPES[self.kinds[i]]
+
+    def to_tree(self):
+        # builds the node objects back from the last node to the root, so the children of a node
+        # are built before it. Lists of children hold the children not taken by the other fields
+        nodes = [None] * len(self)
+
+        for i in range(len(self) - 1, -1, -1):
+            node_type = self.get_node_type(i)
+            children = [nodes[child] for child in self.iter_children(i)]
+            fields = node_type.fields
+
+            if node_type.list_field is not None:
+                list_index = fields.index(node_type.list_field)
+                list_end = len(children) - (len(fields) - list_index - 1)
+                children[list_index:list_end] = [children[list_index:list_end]]
+
+            nodes[i] = node_type(self.get_token(i), *children)
+
+        return nodes[0]
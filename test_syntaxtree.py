@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Run with `python3 -m unittest`
+
+import unittest
+from exceptions import SyntaxRuleError
+from main import Compiler
+from syntaxtree import Output, Block
+
+# deeper than the recursion limit of Python
+NESTING_DEPTH = 1200
+
+
+def compile_body(body, **options):
+    return Compiler(**options).compile('program var xa, xb : integer; begin {} end.\n'.format(body))
+
+
+class BuildTreeTest(unittest.TestCase):
+
+    def test_output_of_identifier_list(self):
+        result = compile_body('xa = 1; xb = 2; writeln xa, xb', optimize=False)
+
+        self.assertIsNone(result.error)
+        self.assertIsNone(result.semantic_error)
+        output = result.tree.body.statements[-1]
+        self.assertIs(type(output), Output)
+        self.assertEqual([expression.name for expression in output.expressions], ['xa', 'xb'])
+
+    def test_assignment_to_identifier_list(self):
+        result = compile_body('xa, xb = 1; writeln xa')
+
+        self.assertIs(type(result.error), SyntaxRuleError)
+        self.assertEqual(result.error.get_line_pos(), (1, 39))
+
+    def test_deeply_nested_blocks(self):
+        body = '{ ' * NESTING_DEPTH + 'xa = 1' + ' }' * NESTING_DEPTH + '; writeln xa'
+        tree = Compiler().front_end.parse('program var xa, xb : integer; begin {} end.\n'.format(body)).tree
+
+        node = tree.body.statements[0]
+        for _ in range(NESTING_DEPTH):
+            self.assertIs(type(node), Block)
+            node = node.statements[0]
+
+        self.assertEqual(node.target.name, 'xa')
+        self.assertIs(type(tree.body.statements[1]), Output)
+
+    def test_compile_deeply_nested_statements(self):
+        heads = ['for xa = 1 to 5 do {', 'do while xb < 3; {', 'switch xb { case 1: xa = 1 case 2: {']
+        ends = ['}', '} loop', '} }']
+        depths = range(NESTING_DEPTH)
+        body = ' '.join(heads[i % 3] for i in depths) + ' xb = xb + 1 ' + \
+            ' '.join(ends[i % 3] for i in reversed(depths)) + '; writeln xa'
+        result = compile_body(body)
+
+        self.assertIsNone(result.error)
+        self.assertIsNone(result.semantic_error)
+        self.assertIn('HLT', result.asm)
+
+
+if __name__ == '__main__':
+    unittest.main()